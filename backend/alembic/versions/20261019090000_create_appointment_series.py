@@ -0,0 +1,41 @@
+"""create appointment_series
+
+Revision ID: 20261019090000
+Revises: aa32e92a7101
+Create Date: 2026-10-19 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20261019090000"
+down_revision = "aa32e92a7101"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "appointment_series",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("client_id", sa.Integer(), nullable=False),
+        sa.Column("starts_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("ends_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("rrule", sa.Text(), nullable=False),
+        sa.Column("exdates", postgresql.ARRAY(sa.DateTime(timezone=True)), server_default="{}", nullable=False),
+        sa.Column("until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["client_id"], ["clients.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_appointment_series_user_id"), "appointment_series", ["user_id"], unique=False)
+    op.create_index(op.f("ix_appointment_series_client_id"), "appointment_series", ["client_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_appointment_series_client_id"), table_name="appointment_series")
+    op.drop_index(op.f("ix_appointment_series_user_id"), table_name="appointment_series")
+    op.drop_table("appointment_series")
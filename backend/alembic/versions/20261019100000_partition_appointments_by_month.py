@@ -0,0 +1,109 @@
+"""partition appointments by month on starts_at
+
+Revision ID: 20261019100000
+Revises: 20261019090000
+Create Date: 2026-10-19 10:00:00.000000
+"""
+
+from alembic import op
+
+revision = "20261019100000"
+down_revision = "20261019090000"
+branch_labels = None
+depends_on = None
+
+# Partitions are created from the oldest existing row up to this many months
+# ahead; the beat task in app.tasks.maintenance keeps extending the window.
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE appointments RENAME TO appointments_legacy")
+    op.execute("ALTER INDEX appointments_pkey RENAME TO appointments_legacy_pkey")
+    op.execute("ALTER INDEX ix_appointments_user_id RENAME TO ix_appointments_legacy_user_id")
+    op.execute("ALTER INDEX ix_appointments_client_id RENAME TO ix_appointments_legacy_client_id")
+
+    # The primary key must include the partition key; ids still come from the
+    # original sequence, so they stay unique on their own.
+    op.execute(
+        """
+        CREATE TABLE appointments (
+            id INTEGER NOT NULL DEFAULT nextval('appointments_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            client_id INTEGER NOT NULL REFERENCES clients (id) ON DELETE CASCADE,
+            starts_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            ends_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            notes TEXT,
+            CONSTRAINT appointments_pkey PRIMARY KEY (id, starts_at)
+        ) PARTITION BY RANGE (starts_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE appointments_id_seq OWNED BY appointments.id")
+    op.execute("CREATE INDEX ix_appointments_user_id_starts_at ON appointments (user_id, starts_at)")
+    op.execute("CREATE INDEX ix_appointments_client_id ON appointments (client_id)")
+
+    # Catch-all for rows outside the managed range; the maintenance task moves
+    # rows out of it whenever it creates the matching monthly partition.
+    op.execute("CREATE TABLE appointments_default PARTITION OF appointments DEFAULT")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month_start TIMESTAMP;
+            last_month TIMESTAMP := date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '{MONTHS_AHEAD} months';
+        BEGIN
+            SELECT date_trunc('month', COALESCE(MIN(starts_at), now()) AT TIME ZONE 'UTC')
+              INTO month_start
+              FROM appointments_legacy;
+            WHILE month_start <= last_month LOOP
+                EXECUTE 'CREATE TABLE '
+                    || quote_ident('appointments_p' || to_char(month_start, 'YYYY_MM'))
+                    || ' PARTITION OF appointments FOR VALUES FROM ('
+                    || quote_literal(month_start::text || '+00')
+                    || ') TO ('
+                    || quote_literal((month_start + INTERVAL '1 month')::text || '+00')
+                    || ')';
+                month_start := month_start + INTERVAL '1 month';
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+    op.execute(
+        """
+        INSERT INTO appointments (id, user_id, client_id, starts_at, ends_at, notes)
+        SELECT id, user_id, client_id, starts_at, ends_at, notes FROM appointments_legacy
+        """
+    )
+    op.execute("DROP TABLE appointments_legacy")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE appointments RENAME TO appointments_partitioned")
+    op.execute("ALTER INDEX appointments_pkey RENAME TO appointments_partitioned_pkey")
+    op.execute("ALTER INDEX ix_appointments_client_id RENAME TO ix_appointments_partitioned_client_id")
+    op.execute(
+        """
+        CREATE TABLE appointments (
+            id INTEGER NOT NULL DEFAULT nextval('appointments_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            client_id INTEGER NOT NULL REFERENCES clients (id) ON DELETE CASCADE,
+            starts_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            ends_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            notes TEXT,
+            CONSTRAINT appointments_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE appointments_id_seq OWNED BY appointments.id")
+    op.execute("CREATE INDEX ix_appointments_user_id ON appointments (user_id)")
+    op.execute("CREATE INDEX ix_appointments_client_id ON appointments (client_id)")
+    op.execute(
+        """
+        INSERT INTO appointments (id, user_id, client_id, starts_at, ends_at, notes)
+        SELECT id, user_id, client_id, starts_at, ends_at, notes FROM appointments_partitioned
+        """
+    )
+    # Archived (detached) partitions are left untouched.
+    op.execute("DROP TABLE appointments_partitioned CASCADE")
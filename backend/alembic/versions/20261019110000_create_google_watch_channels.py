@@ -0,0 +1,41 @@
+"""create google_watch_channels and add sync_token to google_credentials
+
+Revision ID: 20261019110000
+Revises: 20261019100000
+Create Date: 2026-10-19 11:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019110000"
+down_revision = "20261019100000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("google_credentials", sa.Column("sync_token", sa.String(length=512), nullable=True))
+    op.create_table(
+        "google_watch_channels",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("channel_id", sa.String(length=64), nullable=False),
+        sa.Column("resource_id", sa.String(length=255), nullable=False),
+        sa.Column("calendar_id", sa.String(length=255), nullable=False),
+        sa.Column("token", sa.String(length=64), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("channel_id"),
+    )
+    op.create_index(op.f("ix_google_watch_channels_user_id"), "google_watch_channels", ["user_id"], unique=False)
+    op.create_index(op.f("ix_google_watch_channels_expires_at"), "google_watch_channels", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_google_watch_channels_expires_at"), table_name="google_watch_channels")
+    op.drop_index(op.f("ix_google_watch_channels_user_id"), table_name="google_watch_channels")
+    op.drop_table("google_watch_channels")
+    op.drop_column("google_credentials", "sync_token")
@@ -0,0 +1,28 @@
+"""add google_event_id and google_etag to appointments
+
+Revision ID: 20261019120000
+Revises: 20261019110000
+Create Date: 2026-10-19 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261019120000"
+down_revision = "20261019110000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("appointments", sa.Column("google_event_id", sa.String(length=1024), nullable=True))
+    op.add_column("appointments", sa.Column("google_etag", sa.String(length=255), nullable=True))
+    op.create_index(
+        "ix_appointments_user_id_google_event_id", "appointments", ["user_id", "google_event_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_appointments_user_id_google_event_id", table_name="appointments")
+    op.drop_column("appointments", "google_etag")
+    op.drop_column("appointments", "google_event_id")
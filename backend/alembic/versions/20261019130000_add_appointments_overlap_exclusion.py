@@ -0,0 +1,89 @@
+"""prevent overlapping appointments per user with an exclusion constraint
+
+Each monthly partition gets its own EXCLUDE constraint (Postgres cannot put one
+on a partitioned table), so two appointments in different partitions, e.g. one
+spanning a month boundary, are not checked against each other.
+
+The upgrade stops before adding any constraint if existing appointments of the
+same user already overlap within a partition, and lists up to 20 of those pairs.
+Resolve them first by moving or deleting one appointment of each pair. The query
+in ``OVERLAPPING_PAIRS`` lists all of them.
+
+Revision ID: 20261019130000
+Revises: 20261019120000
+Create Date: 2026-10-19 13:00:00.000000
+"""
+
+from alembic import op
+
+revision = "20261019130000"
+down_revision = "20261019120000"
+branch_labels = None
+depends_on = None
+
+OVERLAPPING_PAIRS = """
+    SELECT a.user_id, a.id AS appointment_id, b.id AS overlapping_id
+    FROM appointments a
+    JOIN appointments b
+        ON b.user_id = a.user_id
+        AND b.tableoid = a.tableoid
+        AND b.id > a.id
+        AND b.during && a.during
+    ORDER BY a.user_id, a.id, b.id
+"""
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE appointments ADD COLUMN during tstzrange "
+        "GENERATED ALWAYS AS (tstzrange(starts_at, ends_at, '[)')) STORED"
+    )
+    # Runs in the database, so offline (--sql) scripts check too.
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            conflicts TEXT;
+        BEGIN
+            SELECT string_agg('user ' || user_id || ': ' || appointment_id || '/' || overlapping_id, ', ')
+            INTO conflicts
+            FROM ({OVERLAPPING_PAIRS} LIMIT 20) pairs;
+            IF conflicts IS NOT NULL THEN
+                RAISE EXCEPTION USING
+                    MESSAGE = 'Overlapping appointments (user: id/id): ' || conflicts,
+                    HINT = 'Move or delete one appointment of each pair, then rerun the upgrade '
+                        '(see the docstring of migration 20261019130000).';
+            END IF;
+        END
+        $$
+        """
+    )
+    # Partitioned tables cannot carry EXCLUDE constraints, so each partition
+    # gets its own; app.db.partitions adds it to partitions created later.
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            part TEXT;
+        BEGIN
+            FOR part IN
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = 'appointments'
+            LOOP
+                EXECUTE 'ALTER TABLE ' || quote_ident(part)
+                    || ' ADD CONSTRAINT ' || quote_ident(part || '_no_overlap')
+                    || ' EXCLUDE USING gist (user_id WITH =, during WITH &&)';
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    # Dropping the column drops the per-partition constraints built on it.
+    op.execute("ALTER TABLE appointments DROP COLUMN during")
@@ -0,0 +1,41 @@
+"""create whatsapp_messages for inbound messages
+
+Revision ID: 20261019150000
+Revises: 20261019140000
+Create Date: 2026-10-19 15:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "20261019150000"
+down_revision = "20261019140000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "whatsapp_messages",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("provider_message_id", sa.String(length=128), nullable=False),
+        sa.Column("phone_number_id", sa.String(length=64), nullable=False),
+        sa.Column("from_phone", sa.String(length=32), nullable=False),
+        sa.Column("conversation_key", sa.String(length=100), nullable=False),
+        sa.Column("message_type", sa.String(length=32), nullable=False),
+        sa.Column("body", sa.Text(), nullable=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("provider_message_id"),
+    )
+    op.create_index(
+        "ix_whatsapp_messages_conversation_key_id", "whatsapp_messages", ["conversation_key", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_whatsapp_messages_conversation_key_id", table_name="whatsapp_messages")
+    op.drop_table("whatsapp_messages")
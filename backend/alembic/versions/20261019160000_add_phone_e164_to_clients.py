@@ -0,0 +1,86 @@
+"""add normalized phone_e164 to clients with a unique per-user index
+
+Revision ID: 20261019160000
+Revises: 20261019150000
+Create Date: 2026-10-19 16:00:00.000000
+"""
+
+from alembic import op
+import phonenumbers
+import sqlalchemy as sa
+
+revision = "20261019160000"
+down_revision = "20261019150000"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+DEFAULT_REGION = "MX"
+MEXICO_COUNTRY_CODE = 52
+
+
+def upgrade() -> None:
+    # The backfill runs in Python: the normalization rules (default region, WhatsApp
+    # prefixes) have no SQL equivalent, so an offline script would leave the column empty.
+    if op.get_context().as_sql:
+        raise RuntimeError("20261019160000 backfills phone_e164 in Python and cannot run in --sql mode")
+
+    op.add_column("clients", sa.Column("phone_e164", sa.String(length=16), nullable=True))
+
+    bind = op.get_bind()
+    clients = sa.table(
+        "clients", sa.column("id", sa.Integer), sa.column("user_id", sa.Integer), sa.column("phone", sa.String),
+        sa.column("phone_e164", sa.String),
+    )
+    seen: set[tuple[int, str]] = set()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(clients.c.id, clients.c.user_id, clients.c.phone)
+            .where(clients.c.id > last_id)
+            .order_by(clients.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for client_id, user_id, phone in rows:
+            phone_e164 = _normalize_phone(phone)
+            # Duplicates within a user keep the number on the oldest client only.
+            if phone_e164 and (user_id, phone_e164) not in seen:
+                seen.add((user_id, phone_e164))
+                updates.append({"client_id": client_id, "phone_e164": phone_e164})
+        if updates:
+            bind.execute(
+                clients.update().where(clients.c.id == sa.bindparam("client_id")).values(phone_e164=sa.bindparam("phone_e164")),
+                updates,
+            )
+        last_id = rows[-1][0]
+
+    op.create_index("uq_clients_user_id_phone_e164", "clients", ["user_id", "phone_e164"], unique=True)
+
+
+def _normalize_phone(raw: str | None) -> str | None:
+    # Frozen copy of app.services.phone.normalize_phone as of this revision.
+    if not raw:
+        return None
+    candidates = [raw]
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    if not raw.strip().startswith("+") and digits:
+        candidates.append(f"+{digits}")
+    for candidate in candidates:
+        try:
+            number = phonenumbers.parse(candidate, DEFAULT_REGION)
+        except phonenumbers.NumberParseException:
+            continue
+        national = str(number.national_number)
+        if number.country_code == MEXICO_COUNTRY_CODE and len(national) == 11 and national.startswith("1"):
+            number.national_number = int(national[1:])
+        if phonenumbers.is_possible_number_with_reason(number) == phonenumbers.ValidationResult.IS_POSSIBLE:
+            return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+    return None
+
+
+def downgrade() -> None:
+    op.drop_index("uq_clients_user_id_phone_e164", table_name="clients")
+    op.drop_column("clients", "phone_e164")
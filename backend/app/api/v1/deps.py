@@ -1,9 +1,12 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+from app.core import rate_limit
+from app.core.config import settings
 from app.core.security import SECRET_KEY, ALGORITHM
-from app.db.session import SessionLocal
+from app.db.replica import is_pinned
+from app.db.session import SessionLocal, new_read_session, replica_engines
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/auth/login")
@@ -16,20 +19,78 @@ def get_db():
         db.close()
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    email = _token_subject(token)
+    user = _load_user(db, email)
+    # Lets commits on this session pin the user to the primary (app.db.replica).
+    db.info["pin_subject"] = email
+    return user
+
+def get_read_db(token: str = Depends(oauth2_scheme)):
+    """Session for read-only endpoints: a replica unless the user wrote recently.
+
+    The pin is checked against the token subject so routing never needs the primary.
+    """
+    db = new_read_session() if replica_engines and not is_pinned(_token_subject(token)) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> User:
+    """``get_current_user`` for read-only endpoints, resolved on the ``get_read_db`` session."""
+    return _load_user(db, _token_subject(token))
+
+def _token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        email = email.lower()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    email = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+    return email.lower()
+
+def _load_user(db: Session, email: str) -> User:
     user = db.query(User).filter(User.email == email).first()
     if not user or not user.is_active:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def enforce_rate_limit(scope: str, identity: str, limit: str) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    retry_after = rate_limit.check(scope, identity, rate_limit.Limit.parse(limit))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": rate_limit.retry_after_header(retry_after)},
+        )
+
+def rate_limit_by_ip(scope: str, limit: str):
+    """Dependency limiting ``scope`` per client IP."""
+    def dependency(request: Request) -> None:
+        enforce_rate_limit(scope, client_ip(request), limit)
+    return dependency
+
+def rate_limit_by_user(scope: str, limit: str):
+    """Dependency limiting each route in ``scope`` per authenticated user."""
+    def dependency(request: Request, current_user: User = Depends(get_current_user)) -> None:
+        route = request.scope.get("route")
+        route_key = f"{request.method}:{route.path if route else request.url.path}"
+        enforce_rate_limit(f"{scope}:{route_key}", str(current_user.id), limit)
+    return dependency
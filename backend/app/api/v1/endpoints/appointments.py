@@ -1,94 +1,256 @@
-from datetime import datetime
-import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+import heapq
+from typing import Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from sqlalchemy import select
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import extract, func, or_, select, text
 from sqlalchemy.orm import Session
 
-from app.api.v1.deps import get_current_user, get_db
-from ..schemas.appointment import AppointmentCreate, AppointmentOut, AppointmentUpdate
+from app.api.v1.deps import get_current_user, get_db, get_read_db, get_read_user, rate_limit_by_user
+from app.core.config import settings
+from ..schemas.appointment import (
+    Agenda,
+    AppointmentCreate,
+    AppointmentOut,
+    AppointmentSeriesCreate,
+    AppointmentSeriesException,
+    AppointmentSeriesOut,
+    AppointmentSummary,
+    AppointmentUpdate,
+)
 from app.models.appointment import Appointment
+from app.models.appointment_series import AppointmentSeries
 from app.models.client import Client
 from app.models.user import User
-from app.models.google_credential import GoogleCredential
+from app.services import agenda, outbox
+from app.services.appointments import as_aware, flush_or_conflict
+from app.services.google_calendar import appointment_event_id
+from app.services.recurrence import iter_occurrences, parse_series_rule, series_until
 
 router = APIRouter()
-GOOGLE_CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar"
-
-
-def _get_google_credential(db: Session, user_id: int) -> GoogleCredential | None:
-    return db.query(GoogleCredential).filter(GoogleCredential.user_id == user_id).first()
-
-
-def _build_user_credentials(db: Session, user_id: int) -> tuple[Credentials | None, GoogleCredential | None]:
-    cred = _get_google_credential(db, user_id)
-    if not cred or (not cred.access_token and not cred.refresh_token):
-        return None, cred
-    client_id = os.getenv("GOOGLE_CLIENT_ID")
-    client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
-    return (
-        Credentials(
-            token=cred.access_token,
-            refresh_token=cred.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=client_id,
-            client_secret=client_secret,
-            scopes=[GOOGLE_CALENDAR_SCOPE],
-        ),
-        cred,
-    )
-
+# Booking writes hit Postgres constraints and Google; budget them per user and route.
+write_rate_limit = Depends(rate_limit_by_user("writes", settings.RATE_LIMIT_WRITES_PER_USER))
 
-def _sync_google_event(db: Session, user: User, appointment: Appointment) -> None:
-    creds, cred = _build_user_credentials(db, user.id)
-    if not creds or not cred:
-        return
-    try:
-        if creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            cred.access_token = creds.token
-            db.add(cred)
-            db.commit()
-            db.refresh(cred)
-
-        service = build("calendar", "v3", credentials=creds)
-        client = db.get(Client, appointment.client_id)
-        summary = f"Cita: {client.name}" if client else "Cita programada"
-        event_body = {
-            "summary": summary,
-            "description": appointment.notes or "Agendado desde AgentCaller",
-            "start": {"dateTime": appointment.starts_at.isoformat(), "timeZone": "UTC"},
-            "end": {"dateTime": appointment.ends_at.isoformat(), "timeZone": "UTC"},
-        }
-        service.events().insert(calendarId=cred.calendar_id or "primary", body=event_body).execute()
-        print("✅ Evento creado en Google Calendar")
-    except Exception as exc:
-        print(f"⚠️ Error sincronizando con Google: {exc}")
+# Columns serialized by the list fast path; keep in sync with AppointmentOut.
+APPOINTMENT_LIST_COLUMNS = (
+    Appointment.id,
+    Appointment.client_id,
+    Appointment.starts_at,
+    Appointment.ends_at,
+    Appointment.notes,
+)
 
 
 @router.get("", response_model=list[AppointmentOut])
 def list_appointments(
     date_from: datetime | None = Query(default=None, description="Filter appointments starting after this datetime"),
-    date_to: datetime | None = Query(default=None, description="Filter appointments starting before this datetime"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> list[AppointmentOut]:
+    date_to: datetime | None = Query(
+        default=None,
+        description="Filter appointments starting before this datetime. Recurring series are expanded "
+        "up to RECURRENCE_HORIZON_DAYS past the window start when omitted.",
+    ),
+    expand_series: bool = Query(
+        default=False,
+        description="Also return occurrences of recurring series, with id null and their series_id",
+    ),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> ORJSONResponse:
     if date_from and date_to and date_from > date_to:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must be before date_to")
 
-    stmt = select(Appointment).where(Appointment.user_id == current_user.id).order_by(Appointment.starts_at.asc(), Appointment.id.asc())
+    stmt = (
+        select(*APPOINTMENT_LIST_COLUMNS)
+        .where(Appointment.user_id == current_user.id)
+        .order_by(Appointment.starts_at.asc(), Appointment.id.asc())
+    )
     if date_from:
         stmt = stmt.where(Appointment.starts_at >= date_from)
     if date_to:
         stmt = stmt.where(Appointment.starts_at <= date_to)
-    appointments = db.execute(stmt).scalars().all()
-    return appointments
+    # Rows come straight from our own table, so skip response_model validation
+    # and hand plain dicts to orjson.
+    rows = ({**row._asdict(), "series_id": None} for row in db.execute(stmt))
+    if not expand_series:
+        return ORJSONResponse(list(rows))
+
+    # Series are only expanded inside a bounded window: past occurrences need an
+    # explicit date_from, and open-ended series stop at the horizon.
+    window_start = as_aware(date_from) if date_from else datetime.now(timezone.utc)
+    window_end = as_aware(date_to) if date_to else window_start + timedelta(days=settings.RECURRENCE_HORIZON_DAYS)
+    series_stmt = select(AppointmentSeries).where(
+        AppointmentSeries.user_id == current_user.id,
+        AppointmentSeries.starts_at <= window_end,
+        or_(AppointmentSeries.until.is_(None), AppointmentSeries.until >= window_start),
+    )
+    occurrences = [iter_occurrences(series, window_start, window_end) for series in db.execute(series_stmt).scalars()]
+
+    merged = heapq.merge(rows, *occurrences, key=lambda item: item["starts_at"])
+    return ORJSONResponse(list(merged))
+
+
+@router.get("/summary", response_model=AppointmentSummary)
+def appointment_summary(
+    date_from: datetime = Query(..., description="Count appointments starting at or after this datetime"),
+    date_to: datetime = Query(..., description="Count appointments starting at or before this datetime"),
+    bucket: Literal["day", "week", "month"] = Query(default="day"),
+    tz: str = Query(default="UTC", description="IANA time zone used for bucket boundaries"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> AppointmentSummary:
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must be before date_to")
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown time zone") from exc
+
+    # One grouped query over the (user_id, starts_at) index. Grouping by client
+    # as well lets occurrences of recurring series be folded into the same
+    # distinct-client counts below.
+    local_bucket = func.date_trunc(bucket, func.timezone(tz, Appointment.starts_at))
+    stmt = (
+        select(
+            local_bucket,
+            Appointment.client_id,
+            func.count(),
+            func.sum(extract("epoch", Appointment.ends_at - Appointment.starts_at) / 60),
+        )
+        .where(
+            Appointment.user_id == current_user.id,
+            Appointment.starts_at >= date_from,
+            Appointment.starts_at <= date_to,
+        )
+        # By position: the repeated expression would get fresh bind parameters.
+        .group_by(text("1"), Appointment.client_id)
+    )
+    totals = defaultdict(lambda: {"appointments": 0, "minutes": 0.0, "clients": set()})
+    for bucket_start, client_id, count, minutes in db.execute(stmt):
+        totals[bucket_start]["appointments"] += count
+        totals[bucket_start]["minutes"] += float(minutes or 0)
+        totals[bucket_start]["clients"].add(client_id)
+
+    window_start, window_end = as_aware(date_from), as_aware(date_to)
+    series_stmt = select(AppointmentSeries).where(
+        AppointmentSeries.user_id == current_user.id,
+        AppointmentSeries.starts_at <= window_end,
+        or_(AppointmentSeries.until.is_(None), AppointmentSeries.until >= window_start),
+    )
+    for series in db.execute(series_stmt).scalars():
+        for occurrence in iter_occurrences(series, window_start, window_end):
+            local_start = occurrence["starts_at"].astimezone(zone).replace(tzinfo=None)
+            entry = totals[_truncate(local_start, bucket)]
+            entry["appointments"] += 1
+            entry["minutes"] += (occurrence["ends_at"] - occurrence["starts_at"]).total_seconds() / 60
+            entry["clients"].add(occurrence["client_id"])
+
+    buckets = [
+        {
+            "bucket_start": bucket_start.replace(tzinfo=zone),
+            "appointments": entry["appointments"],
+            "booked_minutes": round(entry["minutes"]),
+            "distinct_clients": len(entry["clients"]),
+        }
+        for bucket_start, entry in sorted(totals.items())
+    ]
+    return {"bucket": bucket, "tz": tz, "buckets": buckets}
+
+
+@router.get("/agenda", response_model=Agenda)
+def get_agenda(
+    start: date | None = Query(default=None, description="First day, in AGENDA_TIMEZONE; defaults to today"),
+    days: int = Query(default=2, ge=1, le=31),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> ORJSONResponse:
+    """Day-by-day agenda with client name and phone, served from the per-day cache."""
+    first = start or agenda.today()
+    targets = [first + timedelta(days=offset) for offset in range(days)]
+    cached = agenda.read_days(db, current_user.id, targets)
+    return ORJSONResponse(
+        {
+            "timezone": settings.AGENDA_TIMEZONE,
+            "days": [{"day": day, "appointments": entries} for day, entries in cached.items()],
+        }
+    )
+
+
+@router.get("/series", response_model=list[AppointmentSeriesOut])
+def list_appointment_series(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> list[AppointmentSeriesOut]:
+    stmt = (
+        select(AppointmentSeries)
+        .where(AppointmentSeries.user_id == current_user.id)
+        .order_by(AppointmentSeries.starts_at.asc(), AppointmentSeries.id.asc())
+    )
+    return db.execute(stmt).scalars().all()
+
+
+@router.post(
+    "/series",
+    response_model=AppointmentSeriesOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[write_rate_limit],
+)
+def create_appointment_series(
+    payload: AppointmentSeriesCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> AppointmentSeriesOut:
+    _ensure_client_exists(db, payload.client_id, current_user.id)
+    _validate_time_range(payload.starts_at, payload.ends_at)
+    if payload.starts_at.tzinfo is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="starts_at must include a timezone offset")
+    try:
+        rule = parse_series_rule(payload.rrule, payload.starts_at)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid rrule: {exc}") from exc
+
+    series = AppointmentSeries(**payload.model_dump(), until=series_until(rule), user_id=current_user.id)
+    db.add(series)
+    agenda.enqueue_refresh(db, current_user.id)
+    db.commit()
+    db.refresh(series)
+    return series
+
+
+@router.post("/series/{series_id}/exceptions", response_model=AppointmentSeriesOut)
+def add_appointment_series_exception(
+    series_id: int,
+    payload: AppointmentSeriesException,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> AppointmentSeriesOut:
+    series = _get_series(db, series_id, current_user.id)
+    occurrence = as_aware(payload.occurrence_starts_at)
+    if occurrence not in series.exdates:
+        # Reassign so SQLAlchemy notices the ARRAY change.
+        series.exdates = [*series.exdates, occurrence]
+    db.add(series)
+    agenda.enqueue_refresh(db, current_user.id, occurrence)
+    db.commit()
+    db.refresh(series)
+    return series
 
 
-@router.post("", response_model=AppointmentOut, status_code=status.HTTP_201_CREATED)
+@router.delete("/series/{series_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_appointment_series(
+    series_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> None:
+    series = _get_series(db, series_id, current_user.id)
+    db.delete(series)
+    agenda.enqueue_refresh(db, current_user.id)
+    db.commit()
+
+
+@router.post("", response_model=AppointmentOut, status_code=status.HTTP_201_CREATED, dependencies=[write_rate_limit])
 def create_appointment(
     payload: AppointmentCreate,
     db: Session = Depends(get_db),
@@ -99,14 +261,15 @@ def create_appointment(
 
     appointment = Appointment(**payload.model_dump(), user_id=current_user.id)
     db.add(appointment)
+    flush_or_conflict(db)
+    outbox.enqueue(db, outbox.APPOINTMENT_UPSERTED, {"appointment_id": appointment.id})
+    agenda.enqueue_refresh(db, current_user.id, appointment.starts_at)
     db.commit()
     db.refresh(appointment)
-
-    _sync_google_event(db, current_user, appointment)
     return appointment
 
 
-@router.patch("/{appointment_id}", response_model=AppointmentOut)
+@router.patch("/{appointment_id}", response_model=AppointmentOut, dependencies=[write_rate_limit])
 def update_appointment(
     appointment_id: int,
     payload: AppointmentUpdate,
@@ -125,16 +288,20 @@ def update_appointment(
     ends_at = data.get("ends_at", appointment.ends_at)
     _validate_time_range(starts_at, ends_at)
 
+    previous_starts_at = appointment.starts_at
     for field, value in data.items():
         setattr(appointment, field, value)
 
     db.add(appointment)
+    flush_or_conflict(db)
+    outbox.enqueue(db, outbox.APPOINTMENT_UPSERTED, {"appointment_id": appointment.id, "fields": sorted(data)})
+    agenda.enqueue_refresh(db, current_user.id, previous_starts_at, appointment.starts_at)
     db.commit()
     db.refresh(appointment)
     return appointment
 
 
-@router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[write_rate_limit])
 def delete_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
@@ -144,7 +311,11 @@ def delete_appointment(
     if not appointment or appointment.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
 
+    # The event may not be recorded yet if its push is still queued; the deterministic id covers that.
+    google_event_id = appointment.google_event_id or appointment_event_id(appointment.id)
     db.delete(appointment)
+    agenda.enqueue_refresh(db, current_user.id, appointment.starts_at)
+    outbox.enqueue(db, outbox.APPOINTMENT_DELETED, {"user_id": current_user.id, "google_event_id": google_event_id})
     db.commit()
 
 
@@ -157,3 +328,20 @@ def _ensure_client_exists(db: Session, client_id: int, user_id: int) -> None:
 def _validate_time_range(starts_at: datetime, ends_at: datetime) -> None:
     if ends_at <= starts_at:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ends_at must be after starts_at")
+
+
+def _get_series(db: Session, series_id: int, user_id: int) -> AppointmentSeries:
+    series = db.get(AppointmentSeries, series_id)
+    if not series or series.user_id != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment series not found")
+    return series
+
+
+def _truncate(local: datetime, bucket: str) -> datetime:
+    """Python counterpart of Postgres date_trunc for naive local timestamps (weeks start on Monday)."""
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 
-from app.api.v1.deps import get_current_user, get_db
+from app.api.v1.deps import client_ip, enforce_rate_limit, get_current_user, get_db, rate_limit_by_ip
+from app.core.config import settings
 from app.api.v1.schemas import Token, UserCreate, UserOut
 from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, get_password_hash, verify_password
 from app.models.user import User
@@ -40,7 +42,12 @@ def _get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email.lower()).first()
 
 
-@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit_by_ip("register", settings.RATE_LIMIT_REGISTER_PER_IP))],
+)
 def register_user(payload: UserCreate, db: Session = Depends(get_db)) -> UserOut:
     existing = _get_user_by_email(db, payload.email)
     if existing:
@@ -53,9 +60,21 @@ def register_user(payload: UserCreate, db: Session = Depends(get_db)) -> UserOut
     return user
 
 
-@router.post("/login", response_model=Token)
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(rate_limit_by_ip("login", settings.RATE_LIMIT_LOGIN_PER_IP))],
+)
 async def login_user(request: Request, db: Session = Depends(get_db)) -> Token:
     payload = await _extract_login_payload(request)
+    # Redis, the user query and bcrypt all block, so they run off the event loop.
+    return await run_in_threadpool(_login, db, payload, client_ip(request))
+
+
+def _login(db: Session, payload: LoginPayload, ip: str) -> Token:
+    # Per account and IP, so one address cannot hammer an account below the per-IP budget.
+    # Keying on the account alone would let anyone lock its owner out.
+    enforce_rate_limit("login-account", f"{payload.email.lower()}|{ip}", settings.RATE_LIMIT_LOGIN_PER_ACCOUNT)
 
     user = _get_user_by_email(db, payload.email)
     if not user or not verify_password(payload.password, user.hashed_password):
@@ -1,16 +1,28 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, Header, HTTPException, Query, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import hmac
 import os
 import datetime
 from typing import Optional
 from pydantic import BaseModel
+from redis.exceptions import RedisError
 
 from app.api.v1 import deps  # FIX IMPORTANTE
+from app.api.v1.schemas import CalendarBackfillOut, GoogleEvent, GoogleEventList
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.appointment import Appointment
 from app.models.user import User
 from app.models.google_credential import GoogleCredential
+from app.models.google_watch_channel import GoogleWatchChannel
+from app.services import agenda
+from app.services.appointments import as_aware, flush_or_conflict
+from app.services.calendar_backfill import get_backfill, start_backfill
+from app.services.google_api import GoogleUnavailable
+from app.services.google_async import AsyncCalendar, GoogleAsyncClient, get_google_client
+from app.tasks.calendar import register_calendar_watch, sync_calendar_delta
 
 router = APIRouter()
 
@@ -21,19 +33,8 @@ def get_credential_record(db: Session, user_id: int):
     return db.query(GoogleCredential).filter(GoogleCredential.user_id == user_id).first()
 
 
-def get_google_creds_with_refresh(db: Session, user_id: int) -> Optional[Credentials]:
-    cred = get_credential_record(db, user_id)
-    if not cred or not cred.access_token:
-        return None
-
-    creds = Credentials(
-        token=cred.access_token,
-        refresh_token=cred.refresh_token,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=os.getenv("GOOGLE_CLIENT_ID"),
-        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-    )
-    return creds
+def _google_unavailable(exc: GoogleUnavailable) -> HTTPException:
+    return HTTPException(503, "Google Calendar no disponible", headers={"Retry-After": str(max(1, int(exc.retry_after)))})
 
 
 @router.get("/auth-url")
@@ -54,57 +55,64 @@ def get_auth_url(redirect_uri: str = Query(...)):
         },
         scopes=SCOPES,
         redirect_uri=redirect_uri,
+        # The callback exchanges the code with the client secret and has no verifier to send.
+        autogenerate_code_verifier=False,
     )
     auth_url, _ = flow.authorization_url(access_type='offline', include_granted_scopes='true', prompt='consent')
     return {"auth_url": auth_url}
 
 
 @router.get("/callback")
-def exchange_code(code: str, redirect_uri: str, db: Session = Depends(deps.get_db), current_user: User = Depends(deps.get_current_user)):
-    client_id = os.getenv("GOOGLE_CLIENT_ID")
-    client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
+async def exchange_code(
+    code: str,
+    redirect_uri: str,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    google: GoogleAsyncClient = Depends(get_google_client),
+):
     try:
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": client_id,
-                    "client_secret": client_secret,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                }
-            },
-            scopes=SCOPES,
-            redirect_uri=redirect_uri,
-        )
-        flow.fetch_token(code=code)
-        creds = flow.credentials
-
-        cred = get_credential_record(db, current_user.id)
-        if not cred:
-            cred = GoogleCredential(user_id=current_user.id)
-            db.add(cred)
-
-        cred.access_token = creds.token
-        if creds.refresh_token:
-            cred.refresh_token = creds.refresh_token
-
-        db.commit()
-        return {"msg": "Conectado"}
+        token = await google.exchange_code(code, redirect_uri)
+    except GoogleUnavailable as e:
+        raise _google_unavailable(e)
     except Exception as e:
         print(f"Callback error: {e}")
         raise HTTPException(400, f"Error Google: {e}")
 
+    await run_in_threadpool(_store_tokens, db, current_user.id, token)
+    return {"msg": "Conectado"}
+
+
+def _store_tokens(db: Session, user_id: int, token: dict) -> None:
+    cred = get_credential_record(db, user_id)
+    if not cred:
+        cred = GoogleCredential(user_id=user_id)
+        db.add(cred)
+
+    cred.access_token = token["access_token"]
+    if token.get("refresh_token"):
+        cred.refresh_token = token["refresh_token"]
+    # Import existing events once; reconnecting does not start it over.
+    start_backfill(db, user_id, cred.calendar_id or 'primary')
+
+    db.commit()
+    register_calendar_watch.delay(user_id)
+
 
 @router.get("/calendars")
-def list_calendars(db: Session = Depends(deps.get_db), current_user: User = Depends(deps.get_current_user)):
-    creds = get_google_creds_with_refresh(db, current_user.id)
-    if not creds:
+async def list_calendars(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    google: GoogleAsyncClient = Depends(get_google_client),
+):
+    cred = await run_in_threadpool(get_credential_record, db, current_user.id)
+    if not cred or not cred.access_token:
         raise HTTPException(401, "No conectado")
 
     try:
-        service = build('calendar', 'v3', credentials=creds)
-        items = service.calendarList().list(minAccessRole='reader').execute().get('items', [])
+        items = await AsyncCalendar(google, cred).list_calendars()
         return {"calendars": [{'id': c['id'], 'summary': c['summary'], 'primary': c.get('primary', False)} for c in items]}
+    except GoogleUnavailable as e:
+        raise _google_unavailable(e)
     except Exception as e:
         raise HTTPException(401, str(e))
 
@@ -129,82 +137,200 @@ def update_settings(payload: CalendarSettingsUpdate, db: Session = Depends(deps.
         raise HTTPException(404, "No conectado")
 
     print(f"[DEBUG] Updating calendar_id from '{cred.calendar_id}' to '{payload.calendar_id}'")
+    if cred.calendar_id != payload.calendar_id:
+        # The sync cursor and push channel belong to the previous calendar.
+        cred.sync_token = None
     cred.calendar_id = payload.calendar_id
+    start_backfill(db, current_user.id, payload.calendar_id)
     db.commit()
     db.refresh(cred)
     print(f"[DEBUG] After commit, calendar_id is: '{cred.calendar_id}'")
+    register_calendar_watch.delay(current_user.id)
 
     return {"msg": "Calendario actualizado"}
 
 
+@router.get("/backfill", response_model=CalendarBackfillOut)
+def get_backfill_progress(db: Session = Depends(deps.get_db), current_user: User = Depends(deps.get_current_user)):
+    """Progress of the import of existing Google events into appointments."""
+    backfill = get_backfill(db, current_user.id)
+    if not backfill:
+        raise HTTPException(404, "Sin importación")
+    return backfill
+
+
+@router.post("/backfill", response_model=CalendarBackfillOut, status_code=202)
+def restart_backfill(db: Session = Depends(deps.get_db), current_user: User = Depends(deps.get_current_user)):
+    """Import the selected calendar again from the start; events already imported are skipped."""
+    cred = get_credential_record(db, current_user.id)
+    if not cred or not cred.access_token:
+        raise HTTPException(401, "No conectado")
+    backfill = start_backfill(db, current_user.id, cred.calendar_id or 'primary', restart=True)
+    db.commit()
+    db.refresh(backfill)
+    return backfill
+
+
 @router.delete("/connection")
 def disconnect_google(db: Session = Depends(deps.get_db), current_user: User = Depends(deps.get_current_user)):
     """Borra las credenciales de la base de datos."""
     cred = get_credential_record(db, current_user.id)
     if cred:
         db.delete(cred)
+        # Without credentials the channels can no longer be synced; later notifications get a 404.
+        db.query(GoogleWatchChannel).filter(GoogleWatchChannel.user_id == current_user.id).delete()
         db.commit()
     return {"msg": "Desconectado"}
 
 
-@router.get("/events")
-def list_events(db: Session = Depends(deps.get_db), current_user: User = Depends(deps.get_current_user)):
-    cred = get_credential_record(db, current_user.id)
-    if not cred:
-        return {"count": 0, "events": []}
+@router.post("/webhook")
+def calendar_webhook(
+    x_goog_channel_id: str = Header(...),
+    x_goog_resource_state: str = Header(...),
+    x_goog_channel_token: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_db),
+):
+    """Google push notification: queue a delta sync for the channel's owner."""
+    channel = db.query(GoogleWatchChannel).filter(GoogleWatchChannel.channel_id == x_goog_channel_id).first()
+    if not channel or not hmac.compare_digest(channel.token, x_goog_channel_token or ""):
+        raise HTTPException(404, "Canal desconocido")
+
+    # "sync" is the handshake sent when the channel is created; nothing changed yet.
+    if x_goog_resource_state != "sync":
+        _enqueue_delta_sync(channel.user_id)
+    return Response(status_code=200)
 
+
+def _enqueue_delta_sync(user_id: int) -> None:
+    debounce = settings.GOOGLE_SYNC_DEBOUNCE_SECONDS
     try:
-        creds = get_google_creds_with_refresh(db, current_user.id)
-        if not creds:
-            return {"count": 0, "events": []}
+        first = get_redis().set(f"calendar:delta-sync:{user_id}", 1, nx=True, ex=debounce)
+    except RedisError:
+        first = True
+    # Notifications in a burst share the sync that runs once the window closes.
+    if first:
+        sync_calendar_delta.apply_async((user_id,), countdown=debounce)
+
 
-        service = build('calendar', 'v3', credentials=creds)
-        target_calendar = cred.calendar_id or 'primary'
+@router.get("/events", response_model=GoogleEventList)
+async def list_events(
+    calendar_id: Optional[list[str]] = Query(None, description="Calendars to read (repeatable); defaults to the selected one"),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    google: GoogleAsyncClient = Depends(get_google_client),
+):
+    cred = await run_in_threadpool(get_credential_record, db, current_user.id)
+    if not cred or not cred.access_token:
+        return {"count": 0, "events": []}
 
-        events_result = service.events().list(
-            calendarId=target_calendar,
+    calendar_ids = calendar_id or [cred.calendar_id or 'primary']
+    try:
+        # Several calendars are fetched concurrently over the shared HTTP/2 pool.
+        by_calendar = await AsyncCalendar(google, cred).list_events_many(
+            calendar_ids,
             timeMin='2025-01-01T00:00:00Z',
             maxResults=20,
-            singleEvents=True,
+            singleEvents='true',
             orderBy='startTime',
-        ).execute()
-        events = events_result.get('items', [])
-        return {"count": len(events), "events": events}
+        )
     except Exception as e:
         print(f"Event fetch error: {e}")
         return {"count": 0, "events": []}
 
+    events = [GoogleEvent.model_validate(event) for calendar_events in by_calendar.values() for event in calendar_events]
+    if len(calendar_ids) > 1:
+        events.sort(key=_event_start)
+    return GoogleEventList(count=len(events), events=events)
+
+
+def _event_start(event: GoogleEvent) -> str:
+    return event.start.date_time or event.start.day or ""
+
 
 @router.patch("/event/{event_id}")
-def update_google_event(
+async def update_google_event(
     event_id: str,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
+    google: GoogleAsyncClient = Depends(get_google_client),
     starts_at: Optional[datetime.datetime] = Query(None),
     ends_at: Optional[datetime.datetime] = Query(None),
     summary: Optional[str] = Query(None),
     notes: Optional[str] = Query(None),
 ):
-    creds = get_google_creds_with_refresh(db, current_user.id)
-    cred_record = get_credential_record(db, current_user.id)
-    if not creds or not cred_record:
+    cred_record = await run_in_threadpool(get_credential_record, db, current_user.id)
+    if not cred_record or not cred_record.access_token:
         raise HTTPException(401, "No conectado")
 
+    # Naive values are read as UTC, as in the appointments API.
+    starts_at = as_aware(starts_at) if starts_at else None
+    ends_at = as_aware(ends_at) if ends_at else None
+    body = {}
+    if starts_at:
+        body["start"] = {"dateTime": starts_at.isoformat(), "timeZone": "UTC"}
+    if ends_at:
+        body["end"] = {"dateTime": ends_at.isoformat(), "timeZone": "UTC"}
+    if summary:
+        body["summary"] = summary
+    if notes:
+        body["description"] = notes
+    if not body:
+        raise HTTPException(400, "Nada que actualizar")
+
+    calendar_id = cred_record.calendar_id or 'primary'
+    appointment = await run_in_threadpool(
+        lambda: db.query(Appointment)
+        .filter(Appointment.user_id == current_user.id, Appointment.google_event_id == event_id)
+        .first()
+    )
+    etag = None
+    previous = None
+    if appointment:
+        etag = appointment.google_etag
+        previous = (appointment.starts_at, appointment.ends_at, appointment.notes)
+        changed = (starts_at or appointment.starts_at, ends_at or appointment.ends_at, notes or appointment.notes)
+        if changed[1] <= changed[0]:
+            raise HTTPException(400, "ends_at must be after starts_at")
+        # Commit the linked appointment before calling Google: a move onto a booked slot is
+        # refused without touching Google, and no row lock is held while Google answers.
+        await run_in_threadpool(_apply_times, db, appointment, cred_record, *changed)
+
     try:
-        service = build('calendar', 'v3', credentials=creds)
-        calendar_id = cred_record.calendar_id or 'primary'
-        event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
-
-        if starts_at:
-            event['start']['dateTime'] = starts_at.isoformat()
-        if ends_at:
-            event['end']['dateTime'] = ends_at.isoformat()
-        if summary:
-            event['summary'] = summary
-        if notes:
-            event['description'] = notes
-
-        updated_event = service.events().update(calendarId=calendar_id, eventId=event_id, body=event).execute()
-        return {"msg": "Evento actualizado", "event_id": updated_event.get("id")}
+        updated_event = await AsyncCalendar(google, cred_record).patch_event(calendar_id, event_id, body, etag)
     except Exception as e:
+        if appointment:
+            # Google kept the old version; put the appointment back in step with it.
+            try:
+                await run_in_threadpool(_apply_times, db, appointment, cred_record, *previous)
+            except HTTPException:
+                print(f"Could not restore appointment for event {event_id}: its old slot was booked meanwhile")
+        if isinstance(e, GoogleUnavailable):
+            raise _google_unavailable(e)
         raise HTTPException(400, f"Error update: {e}")
+
+    if appointment:
+        await run_in_threadpool(_store_etag, db, appointment, updated_event.get("etag"))
+    return {"msg": "Evento actualizado", "event_id": updated_event.get("id")}
+
+
+
+def _apply_times(
+    db: Session,
+    appointment: Appointment,
+    cred: GoogleCredential,
+    starts_at: datetime.datetime,
+    ends_at: datetime.datetime,
+    notes: Optional[str],
+) -> None:
+    previous_starts_at = appointment.starts_at
+    appointment.starts_at, appointment.ends_at, appointment.notes = starts_at, ends_at, notes
+    flush_or_conflict(db)
+    agenda.enqueue_refresh(db, appointment.user_id, previous_starts_at, starts_at)
+    db.commit()
+    # Reload here rather than lazily on the event loop.
+    db.refresh(cred)
+
+
+def _store_etag(db: Session, appointment: Appointment, etag: Optional[str]) -> None:
+    appointment.google_etag = etag
+    db.commit()
@@ -1,30 +1,81 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import or_, select
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, or_, select, true
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.api.v1.deps import get_current_user, get_db
-from ..schemas.client import ClientCreate, ClientOut, ClientUpdate
+from app.api.v1.deps import get_current_user, get_db, get_read_db, get_read_user, rate_limit_by_user
+from app.core.config import settings
+from ..schemas.client import ClientCreate, ClientOut, ClientOverview, ClientUpdate
+from app.models.appointment import Appointment
 from app.models.client import Client
 from app.models.user import User
+from app.services import agenda
+from app.services.phone import normalize_phone
 
 router = APIRouter()
+write_rate_limit = Depends(rate_limit_by_user("writes", settings.RATE_LIMIT_WRITES_PER_USER))
+
+# Columns serialized by the list fast path; keep in sync with ClientOut.
+CLIENT_LIST_COLUMNS = (Client.id, Client.name, Client.phone, Client.phone_e164)
 
 
 @router.get("", response_model=list[ClientOut])
 def list_clients(
     q: str | None = Query(default=None, description="Optional search by name or phone"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-) -> list[ClientOut]:
-    stmt = select(Client).where(Client.user_id == current_user.id).order_by(Client.name.asc(), Client.id.asc()).limit(100)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
+) -> ORJSONResponse:
+    stmt = (
+        select(*CLIENT_LIST_COLUMNS)
+        .where(Client.user_id == current_user.id)
+        .order_by(Client.name.asc(), Client.id.asc())
+        .limit(100)
+    )
+    if q:
+        pattern = f"%{q.lower()}%"
+        stmt = stmt.where(or_(Client.name.ilike(pattern), Client.phone.ilike(pattern)))
+    return ORJSONResponse([row._asdict() for row in db.execute(stmt)])
+
+
+@router.get("/overview", response_model=list[ClientOverview])
+def list_client_overview(
+    q: str | None = Query(default=None, description="Optional search by name or phone"),
+    ids: list[int] | None = Query(default=None, max_length=100, description="Only these clients (repeatable)"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> ORJSONResponse:
+    """Clients with appointment count, next and last appointment, in one query.
+
+    A LATERAL subquery aggregates each listed client's appointments through the
+    client_id index, so only the clients on the page are aggregated.
+    """
+    now = func.now()
+    stats = (
+        select(
+            func.count().label("appointment_count"),
+            func.min(Appointment.starts_at).filter(Appointment.starts_at >= now).label("next_appointment_at"),
+            func.max(Appointment.starts_at).filter(Appointment.starts_at < now).label("last_appointment_at"),
+        )
+        .where(Appointment.client_id == Client.id, Appointment.user_id == current_user.id)
+        .lateral("stats")
+    )
+    stmt = (
+        select(*CLIENT_LIST_COLUMNS, stats.c.appointment_count, stats.c.next_appointment_at, stats.c.last_appointment_at)
+        .join(stats, true())
+        .where(Client.user_id == current_user.id)
+        .order_by(Client.name.asc(), Client.id.asc())
+        .limit(100)
+    )
     if q:
         pattern = f"%{q.lower()}%"
         stmt = stmt.where(or_(Client.name.ilike(pattern), Client.phone.ilike(pattern)))
-    clients = db.execute(stmt).scalars().all()
-    return clients
+    if ids:
+        stmt = stmt.where(Client.id.in_(ids))
+    return ORJSONResponse([row._asdict() for row in db.execute(stmt)])
 
 
-@router.post("", response_model=ClientOut, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=ClientOut, status_code=status.HTTP_201_CREATED, dependencies=[write_rate_limit])
 def create_client(
     payload: ClientCreate,
     db: Session = Depends(get_db),
@@ -32,16 +83,33 @@ def create_client(
 ) -> ClientOut:
     client = Client(**payload.model_dump(), user_id=current_user.id)
     db.add(client)
-    db.commit()
+    _commit_or_conflict(db)
     db.refresh(client)
     return client
 
 
+@router.get("/lookup", response_model=ClientOut)
+def lookup_client(
+    phone: str = Query(..., description="Phone number in any format; matched on its E.164 form"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> ClientOut:
+    phone_e164 = normalize_phone(phone)
+    if not phone_e164:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid phone number")
+    client = db.execute(
+        select(Client).where(Client.user_id == current_user.id, Client.phone_e164 == phone_e164)
+    ).scalar_one_or_none()
+    if not client:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    return client
+
+
 @router.get("/{client_id}", response_model=ClientOut)
 def get_client(
     client_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user)
 ) -> ClientOut:
     client = db.get(Client, client_id)
     if not client or client.user_id != current_user.id:
@@ -49,7 +117,7 @@ def get_client(
     return client
 
 
-@router.patch("/{client_id}", response_model=ClientOut)
+@router.patch("/{client_id}", response_model=ClientOut, dependencies=[write_rate_limit])
 def update_client(
     client_id: int,
     payload: ClientUpdate,
@@ -59,9 +127,26 @@ def update_client(
     client = db.get(Client, client_id)
     if not client or client.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
-    for field, value in payload.model_dump(exclude_unset=True).items():
+    data = payload.model_dump(exclude_unset=True)
+    for field, value in data.items():
         setattr(client, field, value)
+    if data.keys() & {"name", "phone"}:
+        # Agenda entries carry the client's name and phone.
+        agenda.enqueue_refresh(db, current_user.id)
     db.add(client)
-    db.commit()
+    _commit_or_conflict(db)
     db.refresh(client)
     return client
+
+
+def _commit_or_conflict(db: Session) -> None:
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        # unique_violation on uq_clients_user_id_phone_e164.
+        if getattr(exc.orig, "sqlstate", None) == "23505":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="A client with this phone number already exists"
+            ) from exc
+        raise
@@ -1,7 +1,27 @@
-from fastapi import APIRouter
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+from app.services import google_api
 
 router = APIRouter()
+metrics_bearer = HTTPBearer(auto_error=False)
 
 @router.get("/ping")
 def ping():
     return {"pong": True}
+
+
+def require_metrics_token(credentials: HTTPAuthorizationCredentials | None = Depends(metrics_bearer)) -> None:
+    """Allow only requests carrying ``Authorization: Bearer <METRICS_TOKEN>``."""
+    token = credentials.credentials if credentials else ""
+    if not settings.METRICS_TOKEN or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
+
+
+@router.get("/metrics/google", dependencies=[Depends(require_metrics_token)])
+def google_metrics():
+    """Google call counters and circuit-breaker state for this API process."""
+    return google_api.snapshot()
@@ -0,0 +1,52 @@
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.whatsapp import append_messages, extract_messages, verify_signature
+from app.tasks.whatsapp import drain_scheduled_key, drain_whatsapp_shard
+
+router = APIRouter()
+
+
+@router.get("/webhook")
+def verify_webhook(
+    hub_mode: str = Query(..., alias="hub.mode"),
+    hub_verify_token: str = Query(..., alias="hub.verify_token"),
+    hub_challenge: str = Query(..., alias="hub.challenge"),
+):
+    """Subscription handshake: echo the challenge when the verify token matches."""
+    if hub_mode != "subscribe" or not settings.WHATSAPP_VERIFY_TOKEN or hub_verify_token != settings.WHATSAPP_VERIFY_TOKEN:
+        raise HTTPException(403, "Token de verificación inválido")
+    return Response(content=hub_challenge, media_type="text/plain")
+
+
+@router.post("/webhook")
+async def receive_webhook(request: Request):
+    """Validate, append to the conversation's Redis stream and acknowledge; processing happens in Celery."""
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("x-hub-signature-256")):
+        raise HTTPException(403, "Firma inválida")
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(400, "JSON inválido")
+
+    messages = extract_messages(payload)
+    if messages:
+        try:
+            await run_in_threadpool(_append_and_schedule, messages)
+        except RedisError:
+            # Not stored: make the provider retry instead of acknowledging a lost message.
+            raise HTTPException(503, "Cola no disponible")
+    return Response(status_code=200)
+
+
+def _append_and_schedule(messages: list[dict]) -> None:
+    redis = get_redis()
+    for shard in append_messages(redis, messages):
+        # During a burst only the first message per shard schedules a drain.
+        if redis.set(drain_scheduled_key(shard), 1, nx=True, ex=settings.WHATSAPP_DRAIN_LOCK_SECONDS):
+            drain_whatsapp_shard.delay(shard)
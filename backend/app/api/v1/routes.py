@@ -5,6 +5,7 @@ from app.api.v1.endpoints.appointments import router as appointments_router
 from app.api.v1.endpoints.tasks import router as tasks_router
 from app.api.v1.endpoints.calendar import router as calendar_router
 from app.api.v1.endpoints.auth import router as auth_router
+from app.api.v1.endpoints.whatsapp import router as whatsapp_router
 
 api_router = APIRouter()
 api_router.include_router(health_router, tags=["health"])
@@ -13,3 +14,4 @@ api_router.include_router(appointments_router, prefix="/appointments", tags=["ap
 api_router.include_router(tasks_router, prefix="/tasks", tags=["tasks"])
 api_router.include_router(calendar_router, prefix="/calendar", tags=["calendar"])
 api_router.include_router(auth_router, prefix="/auth", tags=["auth"])
+api_router.include_router(whatsapp_router, prefix="/whatsapp", tags=["whatsapp"])
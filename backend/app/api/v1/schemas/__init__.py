@@ -1,15 +1,41 @@
-from .appointment import AppointmentCreate, AppointmentOut, AppointmentUpdate
+from .appointment import (
+    Agenda,
+    AgendaDay,
+    AgendaEntry,
+    AppointmentCreate,
+    AppointmentOut,
+    AppointmentSeriesCreate,
+    AppointmentSeriesException,
+    AppointmentSeriesOut,
+    AppointmentSummary,
+    AppointmentSummaryBucket,
+    AppointmentUpdate,
+)
 from .auth import Token, UserCreate, UserOut
-from .client import ClientCreate, ClientOut, ClientUpdate
+from .calendar import CalendarBackfillOut, GoogleEvent, GoogleEventList, GoogleEventTime
+from .client import ClientCreate, ClientOut, ClientOverview, ClientUpdate
 
 __all__ = [
     "ClientCreate",
     "ClientUpdate",
     "ClientOut",
+    "ClientOverview",
     "UserCreate",
     "UserOut",
     "Token",
     "AppointmentCreate",
     "AppointmentUpdate",
     "AppointmentOut",
+    "AppointmentSeriesCreate",
+    "AppointmentSeriesException",
+    "AppointmentSeriesOut",
+    "AppointmentSummary",
+    "AppointmentSummaryBucket",
+    "Agenda",
+    "AgendaDay",
+    "AgendaEntry",
+    "CalendarBackfillOut",
+    "GoogleEvent",
+    "GoogleEventList",
+    "GoogleEventTime",
 ]
@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -22,6 +23,64 @@ class AppointmentUpdate(BaseModel):
 
 
 class AppointmentOut(AppointmentBase):
+    # Occurrences of a recurring series (GET /appointments?expand_series=true) have no row id of their own.
+    id: int | None
+    series_id: int | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AppointmentSeriesCreate(AppointmentBase):
+    rrule: str = Field(
+        ...,
+        max_length=500,
+        description="RFC 5545 RRULE, e.g. FREQ=WEEKLY;BYDAY=MO;COUNT=10. DAILY or coarser, ended by COUNT or UNTIL "
+        "within 1000 occurrences",
+    )
+
+
+class AppointmentSeriesException(BaseModel):
+    occurrence_starts_at: datetime
+
+
+class AppointmentSeriesOut(AppointmentBase):
     id: int
+    rrule: str
+    exdates: list[datetime]
+    until: datetime | None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class AppointmentSummaryBucket(BaseModel):
+    bucket_start: datetime
+    appointments: int
+    booked_minutes: int
+    distinct_clients: int
+
+
+class AppointmentSummary(BaseModel):
+    bucket: Literal["day", "week", "month"]
+    tz: str
+    buckets: list[AppointmentSummaryBucket]
+
+
+class AgendaEntry(BaseModel):
+    id: int | None
+    series_id: int | None = None
+    client_id: int
+    client_name: str | None
+    client_phone: str | None
+    starts_at: datetime
+    ends_at: datetime
+    notes: str | None
+
+
+class AgendaDay(BaseModel):
+    day: date
+    appointments: list[AgendaEntry]
+
+
+class Agenda(BaseModel):
+    timezone: str
+    days: list[AgendaDay]
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class GoogleEventTime(BaseModel):
+    """Start or end of a Google event, keeping Google's field names: ``dateTime`` or, for all-day events, ``date``."""
+
+    day: str | None = Field(None, alias="date")
+    date_time: str | None = Field(None, alias="dateTime")
+    time_zone: str | None = Field(None, alias="timeZone")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class GoogleEvent(BaseModel):
+    id: str
+    etag: str | None = None
+    status: str | None = None
+    summary: str | None = None
+    description: str | None = None
+    start: GoogleEventTime = Field(default_factory=GoogleEventTime)
+    end: GoogleEventTime = Field(default_factory=GoogleEventTime)
+
+
+class GoogleEventList(BaseModel):
+    count: int
+    events: list[GoogleEvent]
+
+
+class CalendarBackfillOut(BaseModel):
+    calendar_id: str
+    status: str
+    progress: float = Field(..., description="Share of the import window done, 0-100")
+    window_start: datetime
+    window_end: datetime
+    cursor: datetime
+    scanned: int
+    imported: int
+    unmatched: int
+    skipped: int
+    error: str | None
+    started_at: datetime
+    updated_at: datetime
+    finished_at: datetime | None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -17,5 +19,12 @@ class ClientUpdate(BaseModel):
 
 class ClientOut(ClientBase):
     id: int
+    phone_e164: str | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ClientOverview(ClientOut):
+    appointment_count: int
+    next_appointment_at: datetime | None
+    last_appointment_at: datetime | None
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 
 from app.core.config import settings
 
@@ -14,5 +15,39 @@ celery_app.conf.update(
     result_serializer="json",
 )
 celery_app.conf.task_default_queue = "default"
+celery_app.conf.beat_schedule = {
+    "ensure-appointment-partitions": {
+        "task": "app.tasks.maintenance.ensure_appointment_partitions",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "archive-appointment-partitions": {
+        "task": "app.tasks.maintenance.archive_appointment_partitions",
+        "schedule": crontab(hour=2, minute=30, day_of_month=1),
+    },
+    "renew-calendar-watches": {
+        "task": "app.tasks.calendar.renew_calendar_watches",
+        "schedule": crontab(minute=15),
+    },
+    "resume-calendar-backfills": {
+        "task": "app.tasks.calendar_backfill.resume_calendar_backfills",
+        "schedule": crontab(minute="*/10"),
+    },
+    "relay-outbox": {
+        "task": "app.tasks.outbox.relay_outbox",
+        "schedule": settings.OUTBOX_RELAY_INTERVAL_SECONDS,
+    },
+    "purge-outbox": {
+        "task": "app.tasks.outbox.purge_outbox",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "rebuild-agendas": {
+        "task": "app.tasks.agenda.rebuild_agendas",
+        "schedule": crontab(hour=6, minute=30),
+    },
+    "sweep-whatsapp-streams": {
+        "task": "app.tasks.whatsapp.sweep_whatsapp_streams",
+        "schedule": 30.0,
+    },
+}
 
 celery_app.autodiscover_tasks(["app"], related_name="tasks")
@@ -0,0 +1,151 @@
+"""Response compression (brotli or gzip) with a minimum-size threshold.
+
+Works like Starlette's GZipMiddleware, with three additions:
+- it negotiates brotli when the optional ``brotli`` package is installed;
+- it holds back streamed bodies until they reach the threshold, so short
+  streams also go out uncompressed;
+- it flushes the compressor after every chunk, so streamed exports reach the
+  client as they are produced.
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "+json", "+xml")
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits=31 writes a gzip header and trailer.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: tuple[str, ...] = ("br", "gzip"),
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = tuple(e for e in encodings if e == "gzip" or (e == "br" and brotli is not None))
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = self._negotiate(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self.app, encoding, self.minimum_size, self._compressor_factory(encoding))
+        await responder(scope, receive, send)
+
+    def _negotiate(self, scope: Scope) -> str | None:
+        accepted = set()
+        for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+            name, _, params = item.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(name.strip().lower())
+        for encoding in self.encodings:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def _compressor_factory(self, encoding: str):
+        if encoding == "br":
+            return lambda: _BrotliCompressor(self.brotli_quality)
+        return lambda: _GzipCompressor(self.gzip_level)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int, compressor_factory) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.compressor_factory = compressor_factory
+        self.compressor = None
+        self.send: Send | None = None
+        self.initial_message: Message = {}
+        self.passthrough = False
+        self.started = False
+        self.pending = b""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the headers until we know whether the body gets compressed.
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = "content-encoding" in headers or not any(t in content_type for t in COMPRESSIBLE_TYPES)
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.passthrough:
+            await self._start()
+            await self.send(message)
+            return
+
+        if self.compressor is None:
+            self.pending += body
+            if len(self.pending) < self.minimum_size:
+                if not more_body:
+                    # Too small to be worth the CPU: send it as is.
+                    await self._start()
+                    await self.send({"type": "http.response.body", "body": self.pending})
+                return
+            # Threshold reached: switch the response to the compressed encoding.
+            self.compressor = self.compressor_factory()
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            body, self.pending = self.pending, b""
+            if not more_body:
+                compressed = self.compressor.compress(body, final=True)
+                headers["Content-Length"] = str(len(compressed))
+                await self._start()
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            await self._start()
+
+        await self.send(
+            {"type": "http.response.body", "body": self.compressor.compress(body, final=not more_body), "more_body": more_body}
+        )
+
+    async def _start(self) -> None:
+        if not self.started:
+            self.started = True
+            await self.send(self.initial_message)
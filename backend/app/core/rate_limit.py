@@ -0,0 +1,86 @@
+"""Sliding-window rate limiting shared by every API worker through Redis.
+
+Each (scope, identity) pair keeps one counter per fixed window. A request is
+weighed against the current count plus the previous window's count scaled by
+how much of it still overlaps the sliding window. Checking and incrementing is
+a single script call, so the allowed path costs one Redis round trip.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from redis.exceptions import RedisError
+
+from .redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+_SLIDING_WINDOW_SCRIPT = """
+local previous = tonumber(redis.call('GET', KEYS[1]) or '0')
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local overlap = tonumber(ARGV[3])
+if previous * overlap + current + 1 > limit then
+    return {0, previous, current}
+end
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], window * 2)
+return {1, previous, current + 1}
+"""
+
+
+@dataclass(frozen=True)
+class Limit:
+    requests: int
+    seconds: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parse ``"<requests>/<seconds>"``, e.g. ``"10/60"``."""
+        requests, _, seconds = value.partition("/")
+        return cls(int(requests), int(seconds))
+
+
+@lru_cache
+def _script():
+    return get_redis().register_script(_SLIDING_WINDOW_SCRIPT)
+
+
+def check(scope: str, identity: str, limit: Limit) -> float | None:
+    """Count one request; return None when allowed, else the seconds until it would be."""
+    now = time.time()
+    window_index, into_window = divmod(now, limit.seconds)
+    overlap = 1 - into_window / limit.seconds
+    prefix = f"rl:{scope}:{identity}"
+    try:
+        allowed, previous, current = _script()(
+            keys=[f"{prefix}:{int(window_index) - 1}", f"{prefix}:{int(window_index)}"],
+            args=[limit.requests, limit.seconds, overlap],
+        )
+    except RedisError as exc:
+        # Fail open: an unavailable limiter must not take the API down with it.
+        logger.warning("Rate limiter unavailable: %s", exc)
+        return None
+    if allowed:
+        return None
+    return _retry_after(int(previous), int(current), limit, into_window)
+
+
+def _retry_after(previous: int, current: int, limit: Limit, into_window: float) -> float:
+    until_next_window = limit.seconds - into_window
+    if current + 1 > limit.requests:
+        # Even a fully decayed previous window is not enough; the next window
+        # starts with this one as its "previous", so add its decay too.
+        next_overlap_needed = max(limit.requests - 1, 0) / current if current else 1
+        return until_next_window + limit.seconds * (1 - min(next_overlap_needed, 1))
+    # Wait for the previous window's weight to decay below the remaining budget.
+    overlap_needed = (limit.requests - 1 - current) / previous
+    return max(limit.seconds * (1 - overlap_needed) - into_window, 0)
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
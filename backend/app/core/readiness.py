@@ -0,0 +1,135 @@
+"""Dependency readiness checked in the background and served from memory.
+
+Each API process runs one refresher task (started in the app lifespan) that
+checks Postgres, Redis and Celery on an interval, with a timeout per check.
+``/readyz`` only reads the last results, so probes cost no I/O however often
+the load balancer polls. A result older than READINESS_MAX_STALENESS_SECONDS
+counts as failed.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.session import all_engines
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CheckResult:
+    ok: bool
+    latency_ms: float
+    checked_at: float
+    error: str | None = None
+
+
+def check_database() -> None:
+    for engine in all_engines():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+
+def check_redis() -> None:
+    get_redis().ping()
+
+
+def check_celery() -> None:
+    replies = celery_app.control.ping(timeout=min(1.0, settings.READINESS_TIMEOUT_SECONDS))
+    if not replies:
+        raise RuntimeError("no Celery worker answered ping")
+
+
+class ReadinessMonitor:
+    def __init__(self) -> None:
+        self.checks = {
+            "database": (check_database, settings.READINESS_INTERVAL_SECONDS),
+            "redis": (check_redis, settings.READINESS_INTERVAL_SECONDS),
+            "celery": (check_celery, settings.READINESS_CELERY_INTERVAL_SECONDS),
+        }
+        self.required = {name.strip() for name in settings.READINESS_REQUIRED.split(",") if name.strip()}
+        self.results: dict[str, CheckResult] = {}
+        # A check stuck past its timeout keeps its thread; don't start another one next to it.
+        self._running: dict[str, asyncio.Future] = {}
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Run every check once, then keep refreshing in the background."""
+        await self.refresh(force=True)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.READINESS_INTERVAL_SECONDS)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Readiness refresh failed")
+
+    async def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        due = [
+            name
+            for name, (_, interval) in self.checks.items()
+            if force or name not in self.results or now - self.results[name].checked_at >= interval
+        ]
+        await asyncio.gather(*(self._run(name) for name in due))
+
+    async def _run(self, name: str) -> None:
+        check = self.checks[name][0]
+        started = time.monotonic()
+        future = self._running.get(name)
+        if future is None or future.done():
+            future = self._running[name] = asyncio.ensure_future(asyncio.to_thread(check))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), settings.READINESS_TIMEOUT_SECONDS)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {settings.READINESS_TIMEOUT_SECONDS:g}s"
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+        finished = time.monotonic()
+        if error and (name not in self.results or self.results[name].ok):
+            logger.warning("Readiness check %s failed: %s", name, error)
+        self.results[name] = CheckResult(
+            ok=error is None, latency_ms=round((finished - started) * 1000, 2), checked_at=finished, error=error
+        )
+
+    def snapshot(self) -> tuple[bool, dict]:
+        """Return (ready, payload) from the cached results."""
+        now = time.monotonic()
+        dependencies = {}
+        ready = True
+        for name in self.checks:
+            result = self.results.get(name)
+            if result is None:
+                entry = {"ok": False, "required": name in self.required, "error": "not checked yet"}
+            else:
+                age = now - result.checked_at
+                interval = self.checks[name][1]
+                stale = age > max(settings.READINESS_MAX_STALENESS_SECONDS, interval * 2)
+                entry = {
+                    "ok": result.ok and not stale,
+                    "required": name in self.required,
+                    "latency_ms": result.latency_ms,
+                    "age_seconds": round(age, 2),
+                    "error": "stale result" if stale and result.ok else result.error,
+                }
+            if entry["required"] and not entry["ok"]:
+                ready = False
+            dependencies[name] = entry
+        return ready, {"status": "ready" if ready else "unavailable", "dependencies": dependencies}
@@ -0,0 +1,15 @@
+from functools import lru_cache
+
+import redis
+
+from .config import settings
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """Process-wide Redis client; the connection pool is shared by all callers."""
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,42 @@
+"""Per-worker warmup, run from the app lifespan before the worker serves requests.
+
+Without it the first requests after a deploy pay for opening database and Redis
+connections and loading the Google discovery document.
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.session import all_engines
+from app.services.google_calendar import calendar_discovery_document
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> None:
+    started = time.monotonic()
+    for step in (_prime_database_pools, _prime_redis, calendar_discovery_document):
+        try:
+            step()
+        except Exception as exc:
+            # A cold dependency must not stop the worker from starting; /readyz reports it.
+            logger.warning("Warmup step %s failed: %s", step.__name__, exc)
+    logger.info("Warmup finished in %.0f ms", (time.monotonic() - started) * 1000)
+
+
+def _prime_database_pools() -> None:
+    # Hold DB_POOL_SIZE connections at once so the pool keeps that many open, not just one.
+    for engine in all_engines():
+        with ExitStack() as stack:
+            for _ in range(settings.DB_POOL_SIZE):
+                connection = stack.enter_context(engine.connect())
+                connection.execute(text("SELECT 1"))
+
+
+def _prime_redis() -> None:
+    get_redis().ping()
@@ -1,5 +1,10 @@
 from app.db.base_class import Base
 from app.models.client import Client  # noqa
 from app.models.appointment import Appointment  # noqa
+from app.models.appointment_series import AppointmentSeries  # noqa
 from app.models.user import User  # noqa
 from app.models.google_credential import GoogleCredential  # noqa
+from app.models.google_watch_channel import GoogleWatchChannel  # noqa
+from app.models.calendar_backfill import CalendarBackfill  # noqa
+from app.models.outbox_event import OutboxEvent  # noqa
+from app.models.whatsapp_message import WhatsAppMessage  # noqa
@@ -0,0 +1,135 @@
+"""Monthly range partitions for the appointments table.
+
+The table layout is created by the ``partition appointments by month``
+migration; these helpers keep future partitions ahead of inserts and detach
+cold ones for archival.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARENT_TABLE = "appointments"
+DEFAULT_PARTITION = "appointments_default"
+_PARTITION_NAME = re.compile(r"^appointments_p(\d{4})_(\d{2})$")
+# Double-booking guard. Postgres cannot enforce EXCLUDE on a partitioned table,
+# so every partition carries it; overlaps between two partitions (an
+# appointment spanning a month boundary) are not caught.
+OVERLAP_EXCLUSION = "EXCLUDE USING gist (user_id WITH =, during WITH &&)"
+# Longest wait for the parent-table lock a DETACH needs; the monthly run is retried next month.
+ARCHIVE_LOCK_TIMEOUT = "5s"
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y_%m}"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    today = datetime.now(timezone.utc).date()
+    return today.replace(day=1)
+
+
+def attached_partitions(conn: Connection) -> dict[date, str]:
+    rows = conn.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    ).scalars()
+    partitions = {}
+    for name in rows:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_partition(conn: Connection, month: date) -> str:
+    """Create and attach the partition for ``month``.
+
+    Rows that already landed in the default partition for that month are moved
+    into the new table before it is attached, otherwise ATTACH would fail.
+    """
+    name = partition_name(month)
+    lower = f"{month.isoformat()} 00:00:00+00"
+    upper = f"{add_months(month, 1).isoformat()} 00:00:00+00"
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)'))
+    conn.execute(text(f'ALTER TABLE "{name}" ADD CONSTRAINT "{name}_no_overlap" {OVERLAP_EXCLUSION}'))
+    # Generated columns (during) are recomputed by the new table, so copy the rest.
+    columns = ", ".join(
+        conn.execute(
+            text(
+                """
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = :parent AND is_generated = 'NEVER'
+                ORDER BY ordinal_position
+                """
+            ),
+            {"parent": PARENT_TABLE},
+        ).scalars()
+    )
+    conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE starts_at >= :lower AND starts_at < :upper
+                RETURNING {columns}
+            )
+            INSERT INTO "{name}" ({columns}) SELECT {columns} FROM moved
+            """
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION \"{name}\" FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    return name
+
+
+def ensure_partitions(conn: Connection, months_ahead: int) -> list[str]:
+    """Make sure partitions exist from the current month through ``months_ahead``."""
+    existing = attached_partitions(conn)
+    start = current_month()
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(start, offset)
+        if month not in existing:
+            created.append(create_partition(conn, month))
+    return created
+
+
+def archive_partitions(conn: Connection, older_than_months: int, schema: str) -> list[str]:
+    """Detach partitions that ended more than ``older_than_months`` ago and move them to ``schema``.
+
+    ``conn`` must not be inside a transaction: each partition is detached in its
+    own short transaction. DETACH ... CONCURRENTLY is not allowed while the
+    default partition exists, so a plain DETACH is used. It briefly takes an
+    ACCESS EXCLUSIVE lock on the parent table. ``lock_timeout`` bounds the wait
+    for that lock, so queries do not queue up behind it.
+    """
+    cutoff = add_months(current_month(), -older_than_months)
+    archived = []
+    with conn.begin():
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+        partitions = sorted(attached_partitions(conn).items())
+    for month, name in partitions:
+        if add_months(month, 1) > cutoff:
+            continue
+        with conn.begin():
+            conn.execute(text(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'"))
+            conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+            conn.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"'))
+        archived.append(f"{schema}.{name}")
+    return archived
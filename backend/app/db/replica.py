@@ -0,0 +1,54 @@
+"""Read-your-writes pinning for replica routing.
+
+Primary sessions that know their user (see ``deps.get_current_user``) pin that
+user to the primary for ``DATABASE_REPLICA_PIN_SECONDS`` after committing a
+write. The pin lives in Redis so every API worker honours it, and is keyed by
+the token subject (the lowercased email) so reads can be routed before any
+database lookup.
+"""
+
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PIN_KEY = "db:primary-pin:{subject}"
+
+
+def pin_to_primary(subject: str) -> None:
+    try:
+        get_redis().set(PIN_KEY.format(subject=subject), 1, ex=settings.DATABASE_REPLICA_PIN_SECONDS)
+    except RedisError as exc:
+        logger.warning("Could not pin %s to the primary: %s", subject, exc)
+
+
+def is_pinned(subject: str) -> bool:
+    try:
+        return bool(get_redis().exists(PIN_KEY.format(subject=subject)))
+    except RedisError:
+        # Without the pin we cannot promise read-your-writes, so stay on the primary.
+        return True
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_written(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _pin_writer(session: Session) -> None:
+    subject = session.info.get("pin_subject")
+    if session.info.pop("wrote", False) and subject is not None:
+        pin_to_primary(subject)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_written(session: Session) -> None:
+    session.info.pop("wrote", None)
@@ -1,6 +1,30 @@
+import random
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from ..core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+replica_engines = [
+    create_engine(url.strip(), pool_pre_ping=True, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+    for url in (settings.DATABASE_REPLICA_URL or "").split(",")
+    if url.strip()
+]
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def new_read_session() -> Session:
+    """Session bound to a random replica, or to the primary when none are configured."""
+    bind = random.choice(replica_engines) if replica_engines else engine
+    return ReadSessionLocal(bind=bind)
+
+
+def all_engines() -> list:
+    return [engine, *replica_engines]
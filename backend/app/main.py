@@ -1,12 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import re
 
+from .core.compression import CompressionMiddleware
 from .core.config import settings
+from .core.readiness import ReadinessMonitor
+from .core.warmup import warm_up
 from .api.v1.routes import api_router
+from .services.google_async import GoogleAsyncClient
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync endpoints each hold a pooled DB connection; more threads than connections only queue on the pool.
+    threads = settings.API_THREADPOOL_SIZE or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    # One pooled HTTP/2 client per process for every async Google call.
+    app.state.google = GoogleAsyncClient()
+    if settings.WARMUP_ENABLED:
+        await run_in_threadpool(warm_up)
+    app.state.readiness = ReadinessMonitor()
+    await app.state.readiness.start()
+    yield
+    await app.state.readiness.stop()
+    await app.state.google.aclose()
 
 
-app = FastAPI(title=settings.APP_NAME)
+app = FastAPI(title=settings.APP_NAME, default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # CORS configuration
 if settings.APP_ENV == "dev" or settings.APP_ENV == "docker":
@@ -27,10 +52,27 @@ app.add_middleware(
     allow_headers=["*", "Authorization", "Content-Type"],
 )
 
+compression_encodings = tuple(e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",") if e.strip())
+if compression_encodings:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        encodings=compression_encodings,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
 
 @app.get("/healthz")
 def healthz():
     return {"status": "ok"}
 
 
+@app.get("/readyz")
+async def readyz(request: Request):
+    """Readiness for load balancers, from the background checks in ``app.core.readiness``."""
+    ready, payload = request.app.state.readiness.snapshot()
+    return ORJSONResponse(payload, status_code=200 if ready else 503)
+
+
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
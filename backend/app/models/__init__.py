@@ -2,6 +2,11 @@ from app.db.base_class import Base  # noqa
 from .user import User  # noqa
 from .client import Client  # noqa
 from .appointment import Appointment  # noqa
+from .appointment_series import AppointmentSeries  # noqa
 from .google_credential import GoogleCredential  # noqa
+from .google_watch_channel import GoogleWatchChannel  # noqa
+from .calendar_backfill import CalendarBackfill  # noqa
+from .outbox_event import OutboxEvent  # noqa
+from .whatsapp_message import WhatsAppMessage  # noqa
 
-__all__ = ["Base", "User", "Client", "Appointment", "GoogleCredential"]
+__all__ = ["Base", "User", "Client", "Appointment", "AppointmentSeries", "GoogleCredential", "GoogleWatchChannel", "CalendarBackfill", "OutboxEvent", "WhatsAppMessage"]
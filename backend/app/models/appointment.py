@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, Text
+from sqlalchemy import Computed, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import TSTZRANGE, Range
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base_class import Base
@@ -8,10 +9,26 @@ from app.db.base_class import Base
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    # Range-partitioned by month on starts_at (see app.db.partitions). The
+    # database key is (id, starts_at); the mapper keeps id alone so lookups by
+    # id keep working, which is safe because ids come from a single sequence.
+    __table_args__ = (
+        Index("ix_appointments_user_id_starts_at", "user_id", "starts_at"),
+        Index("ix_appointments_user_id_google_event_id", "user_id", "google_event_id"),
+        {"postgresql_partition_by": "RANGE (starts_at)"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"), index=True, nullable=False)
     starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Google Calendar event mirrored from this appointment, and its last known etag.
+    google_event_id: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    google_etag: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Booked time range; each partition excludes overlapping ranges per user
+    # (constraint appointments_p<YYYY_MM>_no_overlap, see app.db.partitions).
+    during: Mapped[Range[datetime] | None] = mapped_column(
+        TSTZRANGE, Computed("tstzrange(starts_at, ends_at, '[)')", persisted=True), deferred=True
+    )
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class CalendarBackfill(Base):
+    """Checkpoint of a user's Google Calendar history import (app.tasks.calendar_backfill).
+
+    ``cursor`` is the start of the chunk being imported and ``page_token`` the next
+    page inside it; both are committed with each imported page, so a run stopped
+    at any point resumes from the last page it finished.
+    """
+
+    __tablename__ = "calendar_backfills"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
+    calendar_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default=STATUS_RUNNING)
+    window_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    window_end: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    cursor: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    page_token: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    scanned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    imported: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Events with no matching client; appointments need one.
+    unmatched: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Already linked, all-day, or overlapping an existing appointment.
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Bumped on every write: a run that loaded the row before a restart fails its next commit instead of overwriting it.
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __mapper_args__ = {"version_id_col": version}
+
+    @property
+    def progress(self) -> float:
+        """Share of the window already imported, 0-100."""
+        total = (self.window_end - self.window_start).total_seconds()
+        if self.status == STATUS_DONE or total <= 0:
+            return 100.0
+        return round(min(max((self.cursor - self.window_start).total_seconds() / total, 0), 1) * 100, 1)
@@ -1,13 +1,24 @@
-from sqlalchemy import ForeignKey, Integer, String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from app.db.base_class import Base
+from app.services.phone import normalize_phone
 
 
 class Client(Base):
     __tablename__ = "clients"
+    # Caller lookup: (user_id, phone_e164) resolves a number with a single index probe.
+    __table_args__ = (Index("uq_clients_user_id_phone_e164", "user_id", "phone_e164", unique=True),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
     name: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
     phone: Mapped[str] = mapped_column(String(50), index=True, nullable=False)
+    # Normalized form of ``phone``, NULL when it does not parse; kept in sync whenever
+    # phone is assigned.
+    phone_e164: Mapped[str | None] = mapped_column(String(16), nullable=True)
+
+    @validates("phone")
+    def _sync_phone_e164(self, key: str, value: str) -> str:
+        self.phone_e164 = normalize_phone(value)
+        return value
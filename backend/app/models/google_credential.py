@@ -18,6 +18,8 @@ class GoogleCredential(Base):
     access_token: Mapped[str | None] = mapped_column(String(512), nullable=True)
     refresh_token: Mapped[str | None] = mapped_column(String(512), nullable=True)
     calendar_id: Mapped[str | None] = mapped_column(String(255), nullable=True, default="primary")
+    # Incremental sync cursor for calendar_id, refreshed by app.tasks.calendar.sync_calendar_delta.
+    sync_token: Mapped[str | None] = mapped_column(String(512), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class WhatsAppMessage(Base):
+    """An inbound WhatsApp message, stored once per provider message id."""
+
+    __tablename__ = "whatsapp_messages"
+    __table_args__ = (Index("ix_whatsapp_messages_conversation_key_id", "conversation_key", "id"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, nullable=False)
+    provider_message_id: Mapped[str] = mapped_column(String(128), unique=True, nullable=False)
+    phone_number_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    from_phone: Mapped[str] = mapped_column(String(32), nullable=False)
+    conversation_key: Mapped[str] = mapped_column(String(100), nullable=False)
+    message_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,183 @@
+"""Per-user daily agenda projection cached in Redis.
+
+Each (user, local day) is one Redis key holding that day's appointments and
+series occurrences, already joined with client name and phone. A read is one
+MGET. Writes to appointments, series and clients enqueue an ``agenda.changed``
+outbox event, and its consumer rebuilds only the affected days. A nightly job
+rebuilds every user's window in case an update was lost. Only days inside the
+window (today through AGENDA_DAYS_AHEAD) are cached. Each key expires when its
+day ends, so past days are never served from a cache that edits no longer refresh.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import orjson
+from redis.exceptions import RedisError
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.appointment import Appointment
+from app.models.appointment_series import AppointmentSeries
+from app.models.client import Client
+from app.services import outbox
+from app.services.recurrence import iter_occurrences
+
+logger = logging.getLogger(__name__)
+
+
+def agenda_zone() -> ZoneInfo:
+    return ZoneInfo(settings.AGENDA_TIMEZONE)
+
+
+def agenda_key(user_id: int, day: date) -> str:
+    return f"agenda:{user_id}:{day.isoformat()}"
+
+
+def today() -> date:
+    return datetime.now(agenda_zone()).date()
+
+
+def window_days() -> list[date]:
+    """Days kept warm: today through AGENDA_DAYS_AHEAD days ahead."""
+    start = today()
+    return [start + timedelta(days=offset) for offset in range(settings.AGENDA_DAYS_AHEAD + 1)]
+
+
+def local_day(moment: datetime) -> date:
+    # Naive datetimes are UTC, matching how timestamptz columns store them.
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(agenda_zone()).date()
+
+
+def build_days(db: Session, user_id: int, days: list[date]) -> dict[date, list[dict]]:
+    """Agenda entries for ``days`` from the database, one range query for all of them."""
+    zone = agenda_zone()
+    agenda: dict[date, list[dict]] = {day: [] for day in days}
+    if not days:
+        return agenda
+    window_start = datetime.combine(min(days), time.min, zone)
+    window_end = datetime.combine(max(days) + timedelta(days=1), time.min, zone)
+
+    rows = db.execute(
+        select(
+            Appointment.id,
+            Appointment.client_id,
+            Appointment.starts_at,
+            Appointment.ends_at,
+            Appointment.notes,
+            Client.name.label("client_name"),
+            Client.phone.label("client_phone"),
+        )
+        .outerjoin(Client, Client.id == Appointment.client_id)
+        .where(
+            Appointment.user_id == user_id,
+            Appointment.starts_at >= window_start,
+            Appointment.starts_at < window_end,
+        )
+    )
+    for row in rows:
+        day = local_day(row.starts_at)
+        if day in agenda:
+            agenda[day].append({**row._asdict(), "series_id": None})
+
+    series_list = db.execute(
+        select(AppointmentSeries).where(
+            AppointmentSeries.user_id == user_id,
+            AppointmentSeries.starts_at < window_end,
+            or_(AppointmentSeries.until.is_(None), AppointmentSeries.until >= window_start),
+        )
+    ).scalars().all()
+    if series_list:
+        clients = {
+            client.id: client
+            for client in db.execute(
+                select(Client).where(Client.id.in_({series.client_id for series in series_list}))
+            ).scalars()
+        }
+        for series in series_list:
+            client = clients.get(series.client_id)
+            # iter_occurrences bounds are inclusive; the window end is exclusive.
+            for occurrence in iter_occurrences(series, window_start, window_end - timedelta(microseconds=1)):
+                day = local_day(occurrence["starts_at"])
+                if day in agenda:
+                    agenda[day].append(
+                        {
+                            **occurrence,
+                            "client_name": client.name if client else None,
+                            "client_phone": client.phone if client else None,
+                        }
+                    )
+
+    for entries in agenda.values():
+        entries.sort(key=lambda entry: (entry["starts_at"], entry["id"] or 0))
+    return agenda
+
+
+def refresh_days(db: Session, user_id: int, days: list[date]) -> None:
+    """Rebuild ``days`` for ``user_id`` and overwrite their cache entries.
+
+    Days that are no longer in the window (a refresh delivered after midnight
+    for what is now yesterday) are dropped from the cache instead.
+    """
+    window = set(window_days())
+    stale = [agenda_key(user_id, day) for day in days if day not in window]
+    if stale:
+        get_redis().delete(*stale)
+    _store(user_id, _encode(build_days(db, user_id, [day for day in days if day in window])))
+
+
+def read_days(db: Session, user_id: int, days: list[date]) -> dict[date, list[dict]]:
+    """Agenda for ``days`` as JSON-ready dicts; cache misses are built from the database and cached."""
+    try:
+        cached = dict(zip(days, get_redis().mget([agenda_key(user_id, day) for day in days])))
+    except RedisError as exc:
+        logger.warning("Agenda cache unavailable: %s", exc)
+        cached = {}
+
+    missing = [day for day in days if cached.get(day) is None]
+    if missing:
+        built = _encode(build_days(db, user_id, missing))
+        cached.update(built)
+        window = set(window_days())
+        try:
+            # NX: an incremental refresh that ran meanwhile may have written fresher data.
+            # Days outside the window are not refreshed on edits, so they are never cached.
+            _store(user_id, {day: raw for day, raw in built.items() if day in window}, only_if_missing=True)
+        except RedisError as exc:
+            logger.warning("Could not cache agenda for user %s: %s", user_id, exc)
+    return {day: orjson.loads(cached[day]) for day in days}
+
+
+def _encode(agenda: dict[date, list[dict]]) -> dict[date, bytes]:
+    return {day: orjson.dumps(entries) for day, entries in agenda.items()}
+
+
+def _store(user_id: int, encoded: dict[date, bytes], only_if_missing: bool = False) -> None:
+    # A day's key expires when the day ends, as it leaves the window.
+    zone = agenda_zone()
+    pipe = get_redis().pipeline(transaction=False)
+    for day, raw in encoded.items():
+        expires_at = datetime.combine(day + timedelta(days=1), time.min, zone)
+        pipe.set(agenda_key(user_id, day), raw, exat=int(expires_at.timestamp()), nx=only_if_missing)
+    pipe.execute()
+
+
+def enqueue_refresh(db: Session, user_id: int, *moments: datetime | None) -> None:
+    """Queue a rebuild of the days ``moments`` fall on, or of the whole window when none are given.
+
+    Runs inside the caller's transaction, like every outbox write.
+    """
+    if moments:
+        window = set(window_days())
+        days = sorted({local_day(moment) for moment in moments if moment} & window)
+        if not days:
+            return
+        payload = {"user_id": user_id, "days": [day.isoformat() for day in days]}
+    else:
+        payload = {"user_id": user_id, "days": None}
+    outbox.enqueue(db, outbox.AGENDA_CHANGED, payload)
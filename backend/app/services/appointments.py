@@ -0,0 +1,28 @@
+"""Appointment write helpers shared by the appointments and calendar endpoints."""
+
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# SQLSTATE exclusion_violation, raised by the per-partition *_no_overlap constraints.
+EXCLUSION_VIOLATION = "23P01"
+
+
+def as_aware(value: datetime) -> datetime:
+    # Naive values are treated as UTC, matching how timestamptz compares them.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def flush_or_conflict(db: Session) -> None:
+    """Flush pending appointment writes; an overlap with another booking becomes a 409."""
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        if getattr(exc.orig, "sqlstate", None) == EXCLUSION_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Appointment overlaps an existing appointment"
+            ) from exc
+        raise
@@ -0,0 +1,197 @@
+"""Import of a user's existing Google Calendar events as appointments.
+
+``start_backfill`` records a checkpoint row and queues
+``app.tasks.calendar_backfill.backfill_calendar_history`` through the outbox.
+The task walks the window in time chunks, one page of events per transaction,
+and calls ``import_events`` for each page. Appointments need a client, so an
+event is imported only when it names a known client. A phone number in its
+summary, description or location is matched on ``phone_e164`` (as in
+``/clients/lookup``). Otherwise only a summary in the app's own "Cita: <name>"
+form is matched on the client name; other titles and attendee names are too
+likely to be personal events. Events already linked to an appointment are left
+to the delta sync.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.appointment import Appointment
+from app.models.calendar_backfill import STATUS_DONE, STATUS_FAILED, STATUS_RUNNING, CalendarBackfill
+from app.models.client import Client
+from app.services import outbox
+from app.services.agenda import enqueue_refresh
+from app.services.google_calendar import DEFAULT_EVENT_DESCRIPTION, EVENT_SUMMARY_PREFIX, event_datetime
+from app.services.phone import is_valid_phone, normalize_phone
+
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+# Dates and times, removed before looking for phones: "2026-10-19 10:00", "19/10/2026", "20261019T1000Z".
+DATE_TIME_PATTERN = re.compile(
+    r"\b\d{4}-\d{1,2}-\d{1,2}(?:[T ]\d{1,2}(?::\d{2}){0,2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{1,2}[/.]\d{1,2}[/.]\d{2,4}\b"
+    r"|\b\d{1,2}:\d{2}(?::\d{2})?\b"
+    r"|\b(?:19|20)\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01])(?:T\d{4,6}Z?)?\b"
+)
+
+
+def get_backfill(db: Session, user_id: int) -> CalendarBackfill | None:
+    return db.execute(select(CalendarBackfill).where(CalendarBackfill.user_id == user_id)).scalar_one_or_none()
+
+
+def start_backfill(db: Session, user_id: int, calendar_id: str, restart: bool = False) -> CalendarBackfill:
+    """(Re)start the import of ``calendar_id`` unless it is already running or done for that calendar.
+
+    Runs inside the caller's transaction, like every outbox write.
+    """
+    backfill = get_backfill(db, user_id)
+    if backfill and backfill.calendar_id == calendar_id and backfill.status != STATUS_FAILED and not restart:
+        return backfill
+    if not backfill:
+        backfill = CalendarBackfill(user_id=user_id)
+        db.add(backfill)
+    now = datetime.now(timezone.utc)
+    backfill.calendar_id = calendar_id
+    backfill.status = STATUS_RUNNING
+    backfill.window_start = now - timedelta(days=settings.GOOGLE_BACKFILL_DAYS_BACK)
+    backfill.window_end = now + timedelta(days=settings.GOOGLE_BACKFILL_DAYS_AHEAD)
+    backfill.cursor = backfill.window_start
+    backfill.page_token = None
+    backfill.scanned = backfill.imported = backfill.unmatched = backfill.skipped = 0
+    backfill.error = None
+    backfill.started_at = now
+    backfill.finished_at = None
+    outbox.enqueue(db, outbox.CALENDAR_BACKFILL_REQUESTED, {"user_id": user_id})
+    return backfill
+
+
+def chunk_end(backfill: CalendarBackfill) -> datetime:
+    return min(backfill.cursor + timedelta(days=settings.GOOGLE_BACKFILL_CHUNK_DAYS), backfill.window_end)
+
+
+def finish(backfill: CalendarBackfill, error: str | None = None) -> None:
+    backfill.status = STATUS_FAILED if error else STATUS_DONE
+    backfill.error = error
+    backfill.page_token = None
+    backfill.finished_at = datetime.now(timezone.utc)
+
+
+def import_events(db: Session, backfill: CalendarBackfill, events: list[dict]) -> int:
+    """Insert appointments for one page of events and update the counters; returns how many were inserted."""
+    user_id = backfill.user_id
+    backfill.scanned += len(events)
+    ids = [event["id"] for event in events]
+    linked = set(
+        db.execute(
+            select(Appointment.google_event_id).where(
+                Appointment.user_id == user_id, Appointment.google_event_id.in_(ids)
+            )
+        ).scalars()
+    ) if ids else set()
+
+    candidates = []
+    for event in events:
+        starts_at, ends_at = event_datetime(event.get("start")), event_datetime(event.get("end"))
+        # All-day events carry no time to book, and chunks overlap on events spanning their boundary.
+        if event["id"] in linked or event.get("status") == "cancelled" or not starts_at or not ends_at or ends_at <= starts_at:
+            backfill.skipped += 1
+            continue
+        candidates.append((event, starts_at, ends_at))
+
+    matches = match_clients(db, user_id, [event for event, _, _ in candidates])
+    rows = []
+    for event, starts_at, ends_at in candidates:
+        client_id = matches.get(event["id"])
+        if client_id is None:
+            backfill.unmatched += 1
+            continue
+        description = event.get("description")
+        rows.append(
+            {
+                "user_id": user_id,
+                "client_id": client_id,
+                "starts_at": starts_at,
+                "ends_at": ends_at,
+                "notes": None if description == DEFAULT_EVENT_DESCRIPTION else description,
+                "google_event_id": event["id"],
+                "google_etag": event.get("etag"),
+            }
+        )
+
+    inserted = _insert(db, rows)
+    backfill.imported += len(inserted)
+    backfill.skipped += len(rows) - len(inserted)
+    if inserted:
+        enqueue_refresh(db, user_id, *(row["starts_at"] for row in inserted))
+    return len(inserted)
+
+
+def match_clients(db: Session, user_id: int, events: list[dict]) -> dict[str, int]:
+    """Map event ids to client ids: phone numbers first, then the client name of a "Cita: " summary."""
+    phones = {event["id"]: _event_phones(event) for event in events}
+    names = {event["id"]: _event_name(event) for event in events}
+    all_phones = {phone for values in phones.values() for phone in values}
+    all_names = {name for name in names.values() if name}
+
+    by_phone = dict(
+        db.execute(
+            select(Client.phone_e164, Client.id).where(Client.user_id == user_id, Client.phone_e164.in_(all_phones))
+        ).all()
+    ) if all_phones else {}
+    by_name: dict[str, int | None] = {}
+    if all_names:
+        lowered = func.lower(Client.name)
+        for name, client_id in db.execute(
+            select(lowered, Client.id).where(Client.user_id == user_id, lowered.in_(all_names))
+        ):
+            # A name shared by several clients identifies none of them.
+            by_name[name] = None if name in by_name else client_id
+
+    matches = {}
+    for event_id in phones:
+        client_id = next((by_phone[phone] for phone in phones[event_id] if phone in by_phone), None)
+        if client_id is None:
+            client_id = by_name.get(names[event_id])
+        if client_id is not None:
+            matches[event_id] = client_id
+    return matches
+
+
+def _event_phones(event: dict) -> list[str]:
+    text = " | ".join(event.get(field) or "" for field in ("summary", "description", "location"))
+    text = DATE_TIME_PATTERN.sub(" | ", text)
+    phones = (normalize_phone(candidate) for candidate in PHONE_PATTERN.findall(text))
+    # Possible-length checks alone accept reference numbers; require an assigned number range.
+    return [phone for phone in phones if phone and is_valid_phone(phone)]
+
+
+def _event_name(event: dict) -> str | None:
+    # Events we pushed ourselves are titled "Cita: <client name>".
+    summary = (event.get("summary") or "").strip()
+    prefix = EVENT_SUMMARY_PREFIX.strip()
+    if not summary.lower().startswith(prefix.lower()):
+        return None
+    return summary[len(prefix):].strip().lower() or None
+
+
+def _insert(db: Session, rows: list[dict]) -> list[dict]:
+    if not rows:
+        return []
+    try:
+        with db.begin_nested():
+            db.add_all(Appointment(**row) for row in rows)
+    except IntegrityError:
+        # Some event overlaps a booked slot; retry one by one and keep the rest.
+        inserted = []
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.add(Appointment(**row))
+            except IntegrityError:
+                continue
+            inserted.append(row)
+        return inserted
+    return rows
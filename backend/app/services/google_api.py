@@ -0,0 +1,243 @@
+"""Guarded calls to Google APIs: timeouts, jittered retries and a circuit breaker.
+
+Every Google request should go through ``call``/``execute`` so a slow or failing
+Google cannot pin API threads. Transient failures (timeouts, connection errors,
+429 and 5xx) are retried with full-jitter backoff inside a per-call deadline.
+Sustained failures open the breaker, and calls then fail fast with
+``GoogleUnavailable`` until a probe succeeds.
+
+Breaker state and counters are per process: each API or Celery worker trips on
+its own, and ``snapshot()`` reports the current process only.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+
+import httplib2
+import httpx
+from google.auth.exceptions import TransportError
+from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GoogleUnavailable(Exception):
+    """Google is failing or the breaker is open; the call was not (fully) attempted."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GoogleAPIError(Exception):
+    """Non-2xx answer from the async client (``app.services.google_async``)."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"Google API {status}: {message}")
+        self.status = status
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened_count = 0
+
+    def allow(self) -> float | None:
+        """Return None if a call may proceed, else the seconds until the next probe."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return None
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if self._state == self.OPEN and remaining <= 0:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return None
+            return max(remaining, 1.0)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened_count += 1
+                    logger.warning("Google circuit breaker opened after %s consecutive failures", self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opened_count": self.opened_count,
+            }
+
+
+breaker = CircuitBreaker(settings.GOOGLE_BREAKER_FAILURE_THRESHOLD, settings.GOOGLE_BREAKER_RESET_SECONDS)
+
+_metrics_lock = threading.Lock()
+_metrics: dict[str, dict[str, float]] = defaultdict(
+    lambda: {"calls": 0, "errors": 0, "retries": 0, "rejected": 0, "latency_ms_total": 0.0, "latency_ms_max": 0.0}
+)
+
+
+def _record(operation: str, **increments: float) -> None:
+    with _metrics_lock:
+        entry = _metrics[operation]
+        for key, value in increments.items():
+            if key == "latency_ms_max":
+                entry[key] = max(entry[key], value)
+            else:
+                entry[key] += value
+
+
+def snapshot() -> dict:
+    with _metrics_lock:
+        operations = {name: dict(values) for name, values in _metrics.items()}
+    return {"breaker": breaker.snapshot(), "operations": operations}
+
+
+def is_transient(exc: Exception) -> bool:
+    if isinstance(exc, HttpError):
+        return exc.resp.status in RETRYABLE_STATUSES
+    if isinstance(exc, GoogleAPIError):
+        return exc.status in RETRYABLE_STATUSES
+    # Timeouts and connection resets are OSErrors; refresh failures surface as TransportError.
+    return isinstance(exc, (OSError, httplib2.HttpLib2Error, TransportError, httpx.TransportError))
+
+
+def call(operation: str, fn, retries: int | None = None, deadline: float | None = None):
+    """Run ``fn()`` against Google under the breaker, retrying transient failures.
+
+    Non-transient errors (404, 412, ...) are raised unchanged and do not count
+    against the breaker. Transient ones are raised after the last attempt, or as
+    ``GoogleUnavailable`` when the breaker rejects the call.
+    """
+    attempts = _Attempts(operation, retries, deadline)
+    while True:
+        attempts.start()
+        try:
+            result = fn()
+        except Exception as exc:
+            time.sleep(attempts.failed(exc))
+            continue
+        attempts.succeeded()
+        return result
+
+
+async def call_async(operation: str, fn, retries: int | None = None, deadline: float | None = None):
+    """``call`` for coroutines: ``fn()`` returns an awaitable, and backoff sleeps without blocking the loop."""
+    attempts = _Attempts(operation, retries, deadline)
+    while True:
+        attempts.start()
+        try:
+            result = await fn()
+        except Exception as exc:
+            await asyncio.sleep(attempts.failed(exc))
+            continue
+        attempts.succeeded()
+        return result
+
+
+class _Attempts:
+    """Breaker, retry and metrics bookkeeping shared by ``call`` and ``call_async``."""
+
+    def __init__(self, operation: str, retries: int | None, deadline: float | None) -> None:
+        self.operation = operation
+        self.retries = settings.GOOGLE_MAX_RETRIES if retries is None else retries
+        self.deadline = time.monotonic() + (settings.GOOGLE_CALL_DEADLINE_SECONDS if deadline is None else deadline)
+        self.attempt = 0
+        self.started = 0.0
+
+    def start(self) -> None:
+        wait = breaker.allow()
+        if wait is not None:
+            _record(self.operation, rejected=1)
+            raise GoogleUnavailable(f"Google circuit open; retry in {wait:.0f}s", retry_after=wait)
+        self.started = time.monotonic()
+
+    def succeeded(self) -> None:
+        self._record_latency()
+        breaker.record_success()
+
+    def failed(self, exc: Exception) -> float:
+        """Return the backoff before the next attempt, or re-raise ``exc`` when there is none.
+
+        Must be called from the ``except`` block handling ``exc``.
+        """
+        self._record_latency()
+        if not is_transient(exc):
+            # Google answered; the error is about this request, not Google's health.
+            breaker.record_success()
+            raise exc
+        breaker.record_failure()
+        _record(self.operation, errors=1)
+        backoff = random.uniform(
+            0, min(settings.GOOGLE_RETRY_MAX_SECONDS, settings.GOOGLE_RETRY_BASE_SECONDS * 2**self.attempt)
+        )
+        if self.attempt >= self.retries or time.monotonic() + backoff >= self.deadline:
+            raise exc
+        logger.info("Retrying Google %s after %s (attempt %s)", self.operation, exc, self.attempt + 1)
+        _record(self.operation, retries=1)
+        self.attempt += 1
+        return backoff
+
+    def _record_latency(self) -> None:
+        elapsed_ms = (time.monotonic() - self.started) * 1000
+        _record(self.operation, calls=1, latency_ms_total=elapsed_ms, latency_ms_max=elapsed_ms)
+
+
+def execute(request, operation: str, **kwargs):
+    """``call`` for a googleapiclient ``HttpRequest``."""
+    return call(operation, request.execute, **kwargs)
+
+
+def authorized_http(credentials) -> AuthorizedHttp:
+    """HTTP transport for ``googleapiclient.discovery.build`` with a socket timeout.
+
+    httplib2 objects are not thread-safe, so build one per service.
+    """
+    return AuthorizedHttp(credentials, http=httplib2.Http(timeout=settings.GOOGLE_TIMEOUT_SECONDS))
+
+
+class TimeoutRequest(Request):
+    """Token-refresh transport whose timeout defaults to GOOGLE_TIMEOUT_SECONDS instead of 120s."""
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        return super().__call__(
+            url, method=method, body=body, headers=headers, timeout=timeout or settings.GOOGLE_TIMEOUT_SECONDS, **kwargs
+        )
+
+
+def refresh_credentials(credentials) -> None:
+    call("oauth.refresh", lambda: credentials.refresh(TimeoutRequest()))
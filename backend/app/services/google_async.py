@@ -0,0 +1,169 @@
+"""Async Google Calendar adapter on a shared HTTP/2 connection pool.
+
+One ``GoogleAsyncClient`` lives for the whole API process (created in the app
+lifespan). Requests multiplex over kept-alive HTTP/2 connections, so awaiting
+Google holds no thread. ``AsyncCalendar`` binds the client to one user's
+stored credential and refreshes the access token when Google answers 401.
+Calls go through ``google_api.call_async`` and share its timeouts, retries,
+breaker and metrics with the synchronous client.
+"""
+
+import asyncio
+import os
+from urllib.parse import quote
+
+import httpx
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.google_credential import GoogleCredential
+from app.services.google_api import GoogleAPIError, call_async
+from app.services.google_calendar import CALENDAR_LIST_FIELDS, EVENT_LIST_FIELDS, GOOGLE_TOKEN_URI
+
+CALENDAR_API = "https://www.googleapis.com/calendar/v3"
+
+
+class GoogleAsyncClient:
+    def __init__(self) -> None:
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(settings.GOOGLE_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def send(self, operation: str, method: str, url: str, **kwargs) -> dict:
+        async def attempt() -> dict:
+            response = await self._http.request(method, url, **kwargs)
+            if response.status_code >= 400:
+                raise GoogleAPIError(response.status_code, _error_message(response))
+            return response.json() if response.content else {}
+
+        return await call_async(operation, attempt)
+
+    async def exchange_code(self, code: str, redirect_uri: str) -> dict:
+        """OAuth authorization-code exchange; returns Google's token response."""
+        return await self.send(
+            "oauth.exchange",
+            "POST",
+            GOOGLE_TOKEN_URI,
+            data={
+                "code": code,
+                "client_id": os.getenv("GOOGLE_CLIENT_ID"),
+                "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
+                "redirect_uri": redirect_uri,
+                "grant_type": "authorization_code",
+            },
+        )
+
+    async def refresh_access_token(self, refresh_token: str) -> str:
+        token = await self.send(
+            "oauth.refresh",
+            "POST",
+            GOOGLE_TOKEN_URI,
+            data={
+                "refresh_token": refresh_token,
+                "client_id": os.getenv("GOOGLE_CLIENT_ID"),
+                "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
+                "grant_type": "refresh_token",
+            },
+        )
+        return token["access_token"]
+
+
+class AsyncCalendar:
+    """Calendar v3 calls on behalf of the owner of ``cred``."""
+
+    def __init__(self, client: GoogleAsyncClient, cred: GoogleCredential) -> None:
+        self.client = client
+        self.cred = cred
+        self._refresh_lock = asyncio.Lock()
+
+    async def _request(self, operation: str, method: str, path: str, headers: dict | None = None, **kwargs) -> dict:
+        for first_try in (True, False):
+            token = self.cred.access_token
+            auth = {"Authorization": f"Bearer {token}", **(headers or {})}
+            try:
+                return await self.client.send(operation, method, f"{CALENDAR_API}{path}", headers=auth, **kwargs)
+            except GoogleAPIError as exc:
+                if exc.status != 401 or not first_try or not self.cred.refresh_token:
+                    raise
+            await self._refresh(token)
+
+    async def _refresh(self, expired_token: str | None) -> None:
+        # Concurrent requests can all hit 401; only the first refreshes, the rest reuse its token.
+        async with self._refresh_lock:
+            if self.cred.access_token != expired_token:
+                return
+            access_token = await self.client.refresh_access_token(self.cred.refresh_token)
+            # Saved in its own transaction: the caller's session may hold writes that
+            # must only commit once the Google call succeeds.
+            await run_in_threadpool(_save_access_token, self.cred.id, access_token)
+            set_committed_value(self.cred, "access_token", access_token)
+
+    async def list_calendars(self, min_access_role: str = "reader") -> list[dict]:
+        result = await self._request(
+            "calendarList.list",
+            "GET",
+            "/users/me/calendarList",
+            params={"minAccessRole": min_access_role, "fields": CALENDAR_LIST_FIELDS},
+        )
+        return result.get("items", [])
+
+    async def list_events(self, calendar_id: str, **params) -> list[dict]:
+        """Events with only the ``EVENT_FIELDS`` parts of each resource."""
+        params = {"fields": EVENT_LIST_FIELDS, **params}
+        result = await self._request("events.list", "GET", f"/calendars/{_quote(calendar_id)}/events", params=params)
+        return result.get("items", [])
+
+    async def list_events_many(self, calendar_ids: list[str], **params) -> dict[str, list[dict]]:
+        """Events of several calendars, fetched concurrently over the shared pool."""
+        results = await asyncio.gather(*(self.list_events(calendar_id, **params) for calendar_id in calendar_ids))
+        return dict(zip(calendar_ids, results))
+
+    async def patch_event(self, calendar_id: str, event_id: str, body: dict, etag: str | None = None) -> dict:
+        """Partial update; with ``etag`` Google answers 412 if the event changed since we last saw it."""
+        return await self._request(
+            "events.patch",
+            "PATCH",
+            f"/calendars/{_quote(calendar_id)}/events/{_quote(event_id)}",
+            headers={"If-Match": etag} if etag else None,
+            params={"fields": "id,etag"},
+            json=body,
+        )
+
+
+def get_google_client(request: Request) -> GoogleAsyncClient:
+    """Dependency returning the process-wide client created in the app lifespan."""
+    return request.app.state.google
+
+
+def _save_access_token(credential_id: int, access_token: str) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(update(GoogleCredential).where(GoogleCredential.id == credential_id).values(access_token=access_token))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _quote(value: str) -> str:
+    # Calendar ids contain "@" and "#"; escape them as a single path segment.
+    return quote(value, safe="")
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        return response.json()["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        return response.text[:200]
@@ -0,0 +1,110 @@
+import os
+from datetime import datetime
+from functools import lru_cache
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.google_credential import GoogleCredential
+from app.services.google_api import authorized_http, execute, refresh_credentials
+
+GOOGLE_CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar"
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+DEFAULT_EVENT_DESCRIPTION = "Agendado desde AgentCaller"
+# Partial-response selectors: Google returns only these parts of each resource.
+EVENT_FIELDS = "id,etag,status,summary,description,start,end"
+EVENT_LIST_FIELDS = f"items({EVENT_FIELDS}),nextPageToken,nextSyncToken"
+CALENDAR_LIST_FIELDS = "items(id,summary,primary),nextPageToken"
+# History import also reads the location, where a client phone number may be.
+BACKFILL_EVENT_LIST_FIELDS = f"items({EVENT_FIELDS},location),nextPageToken"
+EVENT_SUMMARY_PREFIX = "Cita: "
+
+
+def get_credential_record(db: Session, user_id: int) -> GoogleCredential | None:
+    return db.query(GoogleCredential).filter(GoogleCredential.user_id == user_id).first()
+
+
+def build_credentials(cred: GoogleCredential) -> Credentials | None:
+    if not cred.access_token and not cred.refresh_token:
+        return None
+    return Credentials(
+        token=cred.access_token,
+        refresh_token=cred.refresh_token,
+        token_uri=GOOGLE_TOKEN_URI,
+        client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+        scopes=[GOOGLE_CALENDAR_SCOPE],
+    )
+
+
+def calendar_service(db: Session, cred: GoogleCredential):
+    """Calendar v3 client for ``cred``, refreshing and persisting the access token when expired."""
+    creds = build_credentials(cred)
+    if not creds:
+        return None
+    if creds.refresh_token and (creds.expired or not creds.token):
+        refresh_credentials(creds)
+        cred.access_token = creds.token
+        db.add(cred)
+        db.commit()
+    return build_from_document(calendar_discovery_document(), http=authorized_http(creds))
+
+
+@lru_cache
+def calendar_discovery_document() -> str:
+    """Calendar v3 discovery document bundled with googleapiclient, read once per process."""
+    return get_static_doc("calendar", "v3")
+
+
+def appointment_event_id(appointment_id: int) -> str:
+    """Deterministic Google event id, so a retried insert cannot create a duplicate event.
+
+    Google ids use base32hex characters (a-v, 0-9) and need at least five of them.
+    """
+    return f"ac{appointment_id:06d}"
+
+
+def appointment_event_body(appointment: Appointment, client_name: str | None, fields: set[str] | None = None) -> dict:
+    """Google event body for ``appointment``; with ``fields``, only the parts those columns map to."""
+    body = {}
+    if fields is None or "client_id" in fields:
+        body["summary"] = f"{EVENT_SUMMARY_PREFIX}{client_name}" if client_name else "Cita programada"
+    if fields is None or "notes" in fields:
+        body["description"] = appointment.notes or DEFAULT_EVENT_DESCRIPTION
+    if fields is None or "starts_at" in fields:
+        body["start"] = {"dateTime": appointment.starts_at.isoformat(), "timeZone": "UTC"}
+    if fields is None or "ends_at" in fields:
+        body["end"] = {"dateTime": appointment.ends_at.isoformat(), "timeZone": "UTC"}
+    return body
+
+
+def insert_event(service, calendar_id: str, body: dict) -> dict:
+    return execute(service.events().insert(calendarId=calendar_id, body=body, fields="id,etag"), "events.insert")
+
+
+def patch_event(service, calendar_id: str, event_id: str, body: dict, etag: str | None = None) -> dict:
+    """Partial update; with ``etag`` Google answers 412 if the event changed since we last saw it."""
+    request = service.events().patch(calendarId=calendar_id, eventId=event_id, body=body, fields="id,etag")
+    if etag:
+        request.headers["If-Match"] = etag
+    return execute(request, "events.patch")
+
+
+def delete_event(service, calendar_id: str, event_id: str) -> None:
+    try:
+        execute(service.events().delete(calendarId=calendar_id, eventId=event_id), "events.delete")
+    except HttpError as exc:
+        # Already gone on Google's side.
+        if exc.resp.status not in (404, 410):
+            raise
+
+
+def event_datetime(value: dict | None) -> datetime | None:
+    """Timestamp of an event start/end; None for all-day events, which only carry a date."""
+    if not value or not value.get("dateTime"):
+        return None
+    return datetime.fromisoformat(value["dateTime"])
@@ -0,0 +1,32 @@
+"""Transactional outbox: side effects are written as rows next to the change.
+
+``enqueue`` only adds the row to the caller's session, so it commits or rolls
+back with the change itself. ``app.tasks.outbox.relay_outbox`` publishes the
+rows to the Celery task and queue registered for their topic. Publishing is
+at-least-once, so every consumer must be idempotent.
+"""
+
+from sqlalchemy.orm import Session
+
+from app.models.outbox_event import OutboxEvent
+
+APPOINTMENT_UPSERTED = "appointment.upserted"
+APPOINTMENT_DELETED = "appointment.deleted"
+AGENDA_CHANGED = "agenda.changed"
+CALENDAR_BACKFILL_REQUESTED = "calendar.backfill_requested"
+
+# topic -> (Celery task name, queue); the payload is passed as the task kwargs.
+ROUTES: dict[str, tuple[str, str]] = {
+    APPOINTMENT_UPSERTED: ("app.tasks.calendar.push_appointment_event", "calendar"),
+    APPOINTMENT_DELETED: ("app.tasks.calendar.delete_appointment_event", "calendar"),
+    AGENDA_CHANGED: ("app.tasks.agenda.refresh_agenda", "default"),
+    CALENDAR_BACKFILL_REQUESTED: ("app.tasks.calendar_backfill.backfill_calendar_history", "calendar"),
+}
+
+
+def enqueue(db: Session, topic: str, payload: dict) -> OutboxEvent:
+    if topic not in ROUTES:
+        raise ValueError(f"No outbox route for topic {topic!r}")
+    event = OutboxEvent(topic=topic, payload=payload)
+    db.add(event)
+    return event
@@ -0,0 +1,48 @@
+import phonenumbers
+
+from app.core.config import settings
+
+MEXICO_COUNTRY_CODE = 52
+
+
+def normalize_phone(raw: str | None, region: str | None = None) -> str | None:
+    """E.164 form of ``raw`` (e.g. ``+525550001234``), or None if it is not a possible number.
+
+    Numbers that are only dialable locally (a 7-digit ``555-1234`` with no area code)
+    are not possible numbers here.
+
+    Numbers without a ``+`` prefix are read as local to ``region`` (PHONE_DEFAULT_REGION
+    by default); digit strings that only parse as international (WhatsApp ``wa_id``
+    values) are retried with a ``+``.
+    """
+    if not raw:
+        return None
+    region = region or settings.PHONE_DEFAULT_REGION
+    candidates = [raw]
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    if not raw.strip().startswith("+") and digits:
+        candidates.append(f"+{digits}")
+    for candidate in candidates:
+        try:
+            number = phonenumbers.parse(candidate, region)
+        except phonenumbers.NumberParseException:
+            continue
+        _drop_mexican_mobile_prefix(number)
+        if phonenumbers.is_possible_number_with_reason(number) == phonenumbers.ValidationResult.IS_POSSIBLE:
+            return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+    return None
+
+
+def _drop_mexican_mobile_prefix(number: phonenumbers.PhoneNumber) -> None:
+    # Mexico dropped the "1" mobile prefix in 2019, but WhatsApp still sends +521XXXXXXXXXX.
+    national = str(number.national_number)
+    if number.country_code == MEXICO_COUNTRY_CODE and len(national) == 11 and national.startswith("1"):
+        number.national_number = int(national[1:])
+
+
+def is_valid_phone(phone_e164: str) -> bool:
+    """Whether a normalized number is actually assigned in its numbering plan, not just the right length."""
+    try:
+        return phonenumbers.is_valid_number(phonenumbers.parse(phone_e164))
+    except phonenumbers.NumberParseException:
+        return False
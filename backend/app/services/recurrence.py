@@ -0,0 +1,102 @@
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from itertools import islice
+
+from dateutil.rrule import rrule, rrulestr
+
+from app.models.appointment_series import AppointmentSeries
+
+# A series holds at most this many occurrences. Rules are walked from the first
+# occurrence, so this bounds the work of every read and write.
+MAX_SERIES_OCCURRENCES = 1000
+SERIES_FREQUENCIES = {"YEARLY", "MONTHLY", "WEEKLY", "DAILY"}
+
+
+def parse_rrule(rule: str, dtstart: datetime) -> rrule:
+    """Parse an RFC 5545 RRULE anchored at ``dtstart``; raises ValueError when invalid."""
+    rule = _strip_prefix(rule)
+    if "DTSTART" in rule.upper() or "\n" in rule:
+        raise ValueError("Only a single RRULE line is supported")
+    parsed = rrulestr(rule, dtstart=dtstart)
+    if not isinstance(parsed, rrule):
+        raise ValueError("Only a single RRULE line is supported")
+    return parsed
+
+
+def parse_series_rule(rule: str, dtstart: datetime) -> rrule:
+    """``parse_rrule`` plus the limits a new series must respect; raises ValueError.
+
+    FREQ must be DAILY or coarser, and COUNT or UNTIL must end the series within
+    MAX_SERIES_OCCURRENCES occurrences. Older rows are not re-checked: reads stop
+    at MAX_SERIES_OCCURRENCES anyway.
+    """
+    parsed = parse_rrule(rule, dtstart)
+    parts = rule_parts(rule)
+    if parts.get("FREQ") not in SERIES_FREQUENCIES:
+        raise ValueError("FREQ must be DAILY or coarser")
+    if "COUNT" in parts:
+        if int(parts["COUNT"]) > MAX_SERIES_OCCURRENCES:
+            raise ValueError(f"COUNT must be at most {MAX_SERIES_OCCURRENCES}")
+    elif "UNTIL" in parts:
+        if next(islice(parsed, MAX_SERIES_OCCURRENCES, None), None) is not None:
+            raise ValueError(f"UNTIL allows more than {MAX_SERIES_OCCURRENCES} occurrences")
+    else:
+        raise ValueError("COUNT or UNTIL is required")
+    return parsed
+
+
+def rule_parts(rule: str) -> dict[str, str]:
+    """RRULE properties by name, e.g. ``{"FREQ": "WEEKLY", "COUNT": "10"}``."""
+    parts = {}
+    for item in _strip_prefix(rule).split(";"):
+        name, separator, value = item.partition("=")
+        if separator:
+            parts[name.strip().upper()] = value.strip().upper()
+    return parts
+
+
+def series_until(rule: rrule) -> datetime | None:
+    """Start of the last occurrence, counting at most MAX_SERIES_OCCURRENCES of them."""
+    last = None
+    for last in islice(rule, MAX_SERIES_OCCURRENCES):
+        pass
+    return last
+
+
+def iter_occurrences(series: AppointmentSeries, window_start: datetime, window_end: datetime) -> Iterator[dict]:
+    """Yield occurrences of ``series`` starting within [window_start, window_end], in order.
+
+    Occurrences are generated one at a time and never past the window or the
+    MAX_SERIES_OCCURRENCES-th occurrence.
+    """
+    rule = parse_rrule(series.rrule, series.starts_at)
+    duration = series.ends_at - series.starts_at
+    excluded = {_as_utc(value) for value in series.exdates or ()}
+    for starts_at in islice(rule, MAX_SERIES_OCCURRENCES):
+        if starts_at > window_end:
+            break
+        if starts_at < window_start:
+            continue
+        if _as_utc(starts_at) in excluded:
+            continue
+        yield {
+            "id": None,
+            "series_id": series.id,
+            "client_id": series.client_id,
+            "starts_at": starts_at,
+            "ends_at": starts_at + duration,
+            "notes": series.notes,
+        }
+
+
+def _strip_prefix(rule: str) -> str:
+    rule = rule.strip()
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    return rule
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -1,3 +1,33 @@
+from .agenda import rebuild_agendas, refresh_agenda  # noqa: F401
+from .calendar import (  # noqa: F401
+    delete_appointment_event,
+    push_appointment_event,
+    register_calendar_watch,
+    renew_calendar_watches,
+    sync_calendar_delta,
+)
+from .calendar_backfill import backfill_calendar_history, resume_calendar_backfills  # noqa: F401
 from .demo import ping, slow_add  # noqa: F401
+from .maintenance import archive_appointment_partitions, ensure_appointment_partitions  # noqa: F401
+from .outbox import purge_outbox, relay_outbox  # noqa: F401
+from .whatsapp import drain_whatsapp_shard, sweep_whatsapp_streams  # noqa: F401
 
-__all__ = ["ping", "slow_add"]
+__all__ = [
+    "ping",
+    "slow_add",
+    "ensure_appointment_partitions",
+    "archive_appointment_partitions",
+    "register_calendar_watch",
+    "renew_calendar_watches",
+    "sync_calendar_delta",
+    "push_appointment_event",
+    "delete_appointment_event",
+    "backfill_calendar_history",
+    "resume_calendar_backfills",
+    "relay_outbox",
+    "purge_outbox",
+    "drain_whatsapp_shard",
+    "sweep_whatsapp_streams",
+    "refresh_agenda",
+    "rebuild_agendas",
+]
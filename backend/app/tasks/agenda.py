@@ -0,0 +1,40 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app.celery_app import celery_app
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.services.agenda import refresh_days, window_days
+
+
+@celery_app.task(name="app.tasks.agenda.refresh_agenda", queue="default", ignore_result=True)
+def refresh_agenda(user_id: int, days: list[str] | None = None):
+    """Rebuild cached agenda days for one user; ``days=None`` means the whole window.
+
+    Delivered by the outbox relay. The days are rebuilt from committed data, so
+    duplicate deliveries are harmless.
+    """
+    db = SessionLocal()
+    try:
+        targets = [date.fromisoformat(day) for day in days] if days else window_days()
+        refresh_days(db, user_id, targets)
+        return {"user_id": user_id, "days": [day.isoformat() for day in targets]}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.tasks.agenda.rebuild_agendas", queue="default")
+def rebuild_agendas():
+    """Nightly full rebuild of every active user's window, in case an incremental update was lost."""
+    db = SessionLocal()
+    try:
+        user_ids = db.execute(select(User.id).where(User.is_active.is_(True)).order_by(User.id)).scalars().all()
+        days = window_days()
+        for user_id in user_ids:
+            refresh_days(db, user_id, days)
+            # Drop loaded rows between users so memory stays flat.
+            db.expunge_all()
+        return {"users": len(user_ids), "days": len(days)}
+    finally:
+        db.close()
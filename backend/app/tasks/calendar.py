@@ -0,0 +1,297 @@
+import logging
+import random
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment
+from app.models.client import Client
+from app.models.google_credential import GoogleCredential
+from app.models.google_watch_channel import GoogleWatchChannel
+from app.services.agenda import enqueue_refresh
+from app.services.google_api import GoogleUnavailable, execute, is_transient
+from app.services.google_calendar import (
+    DEFAULT_EVENT_DESCRIPTION,
+    EVENT_LIST_FIELDS,
+    appointment_event_body,
+    appointment_event_id,
+    calendar_service,
+    delete_event,
+    event_datetime,
+    get_credential_record,
+    insert_event,
+    patch_event,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.calendar.register_calendar_watch", queue="calendar")
+def register_calendar_watch(user_id: int):
+    """Open a push channel on the user's calendar and stop the ones it replaces."""
+    if not settings.GOOGLE_WEBHOOK_URL:
+        return {"registered": False, "reason": "GOOGLE_WEBHOOK_URL not set"}
+
+    db = SessionLocal()
+    try:
+        cred = get_credential_record(db, user_id)
+        service = calendar_service(db, cred) if cred else None
+        if not service:
+            return {"registered": False, "reason": "not connected"}
+
+        calendar_id = cred.calendar_id or "primary"
+        if not cred.sync_token:
+            # Notifications are only useful once there is a cursor to sync from.
+            cred.sync_token = _full_sync_token(service, calendar_id)
+            db.commit()
+
+        channel = GoogleWatchChannel(
+            user_id=user_id,
+            channel_id=uuid.uuid4().hex,
+            calendar_id=calendar_id,
+            token=secrets.token_urlsafe(32),
+        )
+        response = execute(service.events().watch(
+            calendarId=calendar_id,
+            body={
+                "id": channel.channel_id,
+                "type": "web_hook",
+                "address": settings.GOOGLE_WEBHOOK_URL,
+                "token": channel.token,
+                "params": {"ttl": str(settings.GOOGLE_WATCH_TTL_SECONDS)},
+            },
+        ), "events.watch")
+        channel.resource_id = response["resourceId"]
+        channel.expires_at = datetime.fromtimestamp(int(response["expiration"]) / 1000, tz=timezone.utc)
+
+        previous = db.execute(select(GoogleWatchChannel).where(GoogleWatchChannel.user_id == user_id)).scalars().all()
+        db.add(channel)
+        for old in previous:
+            _stop_channel(service, old)
+            db.delete(old)
+        db.commit()
+        return {"registered": True, "channel_id": channel.channel_id, "expires_at": channel.expires_at.isoformat()}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.tasks.calendar.renew_calendar_watches", queue="calendar")
+def renew_calendar_watches():
+    """Re-register channels close to expiry and connected calendars that have none."""
+    if not settings.GOOGLE_WEBHOOK_URL:
+        return {"renewed": []}
+
+    db = SessionLocal()
+    try:
+        renew_before = datetime.now(timezone.utc) + timedelta(seconds=settings.GOOGLE_WATCH_RENEW_BEFORE_SECONDS)
+        expiring = select(GoogleWatchChannel.user_id).where(GoogleWatchChannel.expires_at <= renew_before)
+        unwatched = select(GoogleCredential.user_id).where(
+            ~GoogleCredential.user_id.in_(select(GoogleWatchChannel.user_id))
+        )
+        user_ids = set(db.execute(expiring).scalars()) | set(db.execute(unwatched).scalars())
+    finally:
+        db.close()
+
+    for user_id in user_ids:
+        register_calendar_watch.delay(user_id)
+    return {"renewed": sorted(user_ids)}
+
+
+@celery_app.task(name="app.tasks.calendar.sync_calendar_delta", queue="calendar")
+def sync_calendar_delta(user_id: int):
+    """Pull only the events that changed since the stored sync token and apply them to linked appointments."""
+    db = SessionLocal()
+    try:
+        cred = get_credential_record(db, user_id)
+        service = calendar_service(db, cred) if cred else None
+        if not service:
+            return {"changed": 0}
+
+        calendar_id = cred.calendar_id or "primary"
+        if not cred.sync_token:
+            cred.sync_token = _full_sync_token(service, calendar_id)
+            db.commit()
+            return {"changed": 0, "resynced": True}
+
+        changed = []
+        page_token = None
+        try:
+            while True:
+                page = execute(service.events().list(
+                    calendarId=calendar_id,
+                    syncToken=cred.sync_token,
+                    pageToken=page_token,
+                    showDeleted=True,
+                    singleEvents=True,
+                    fields=EVENT_LIST_FIELDS,
+                ), "events.list")
+                changed.extend(page.get("items", []))
+                page_token = page.get("nextPageToken")
+                if not page_token:
+                    break
+        except HttpError as exc:
+            if exc.resp.status != 410:
+                raise
+            # Google expired the token; start over from a fresh full listing.
+            cred.sync_token = _full_sync_token(service, calendar_id)
+            db.commit()
+            return {"changed": 0, "resynced": True}
+
+        applied = _apply_event_changes(db, user_id, changed)
+        cred.sync_token = page["nextSyncToken"]
+        db.commit()
+        logger.info("Calendar delta for user %s: %s changed events, %s applied", user_id, len(changed), applied)
+        return {"changed": len(changed), "applied": applied}
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="app.tasks.calendar.push_appointment_event", queue="calendar", max_retries=5)
+def push_appointment_event(self, appointment_id: int, fields: list[str] | None = None):
+    """Mirror an appointment to Google; delivered by the outbox relay, so safe to run more than once.
+
+    The appointment is re-read rather than taken from the payload, so duplicate or
+    out-of-order deliveries still leave Google with the latest committed state.
+    """
+    db = SessionLocal()
+    try:
+        appointment = db.get(Appointment, appointment_id)
+        if not appointment:
+            return {"pushed": False, "reason": "deleted"}
+        cred = get_credential_record(db, appointment.user_id)
+        if not cred:
+            return {"pushed": False, "reason": "not connected"}
+
+        calendar_id = cred.calendar_id or "primary"
+        client = db.get(Client, appointment.client_id)
+        client_name = client.name if client else None
+        try:
+            service = calendar_service(db, cred)
+            if not service:
+                return {"pushed": False, "reason": "not connected"}
+            if appointment.google_event_id:
+                body = appointment_event_body(appointment, client_name, set(fields) if fields is not None else None)
+                if not body:
+                    return {"pushed": False, "reason": "nothing to patch"}
+                event = patch_event(service, calendar_id, appointment.google_event_id, body, appointment.google_etag)
+            else:
+                event_id = appointment_event_id(appointment.id)
+                body = appointment_event_body(appointment, client_name)
+                try:
+                    event = insert_event(service, calendar_id, {"id": event_id, **body})
+                except HttpError as exc:
+                    if exc.resp.status != 409:
+                        raise
+                    # An earlier delivery created the event but did not get to record it.
+                    event = patch_event(service, calendar_id, event_id, {**body, "status": "confirmed"})
+                appointment.google_event_id = event["id"]
+        except GoogleUnavailable as exc:
+            raise self.retry(exc=exc, countdown=exc.retry_after)
+        except Exception as exc:
+            if isinstance(exc, HttpError) and exc.resp.status == 412:
+                # Edited on Google since our last sync: Google wins, and the delta
+                # sync pulls its version back into the appointment.
+                sync_calendar_delta.delay(appointment.user_id)
+                return {"pushed": False, "reason": "conflict"}
+            if is_transient(exc):
+                raise self.retry(exc=exc, countdown=_retry_countdown(self.request.retries))
+            raise
+        appointment.google_etag = event["etag"]
+        db.commit()
+        return {"pushed": True, "event_id": appointment.google_event_id}
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="app.tasks.calendar.delete_appointment_event", queue="calendar", max_retries=5)
+def delete_appointment_event(self, user_id: int, google_event_id: str):
+    db = SessionLocal()
+    try:
+        cred = get_credential_record(db, user_id)
+        if not cred:
+            return {"deleted": False, "reason": "not connected"}
+        try:
+            service = calendar_service(db, cred)
+            if not service:
+                return {"deleted": False, "reason": "not connected"}
+            delete_event(service, cred.calendar_id or "primary", google_event_id)
+        except GoogleUnavailable as exc:
+            raise self.retry(exc=exc, countdown=exc.retry_after)
+        except Exception as exc:
+            if is_transient(exc):
+                raise self.retry(exc=exc, countdown=_retry_countdown(self.request.retries))
+            raise
+        return {"deleted": True, "event_id": google_event_id}
+    finally:
+        db.close()
+
+
+def _retry_countdown(retries: int) -> float:
+    # Full jitter so a burst of failed pushes does not come back in lockstep.
+    return random.uniform(0, min(300, 5 * 2**retries))
+
+
+def _apply_event_changes(db, user_id: int, events: list[dict]) -> int:
+    by_id = {event["id"]: event for event in events}
+    if not by_id:
+        return 0
+    stmt = select(Appointment).where(Appointment.user_id == user_id, Appointment.google_event_id.in_(list(by_id)))
+    applied = 0
+    for appointment in db.execute(stmt).scalars():
+        event = by_id[appointment.google_event_id]
+        if event.get("etag") and event["etag"] == appointment.google_etag:
+            # Echo of our own insert/patch.
+            continue
+        if event.get("status") == "cancelled":
+            db.delete(appointment)
+            enqueue_refresh(db, user_id, appointment.starts_at)
+            applied += 1
+            continue
+        previous_starts_at = appointment.starts_at
+        try:
+            with db.begin_nested():
+                starts_at, ends_at = event_datetime(event.get("start")), event_datetime(event.get("end"))
+                if starts_at and ends_at:
+                    appointment.starts_at, appointment.ends_at = starts_at, ends_at
+                if "description" in event:
+                    description = event["description"]
+                    appointment.notes = None if description == DEFAULT_EVENT_DESCRIPTION else description
+                appointment.google_etag = event.get("etag")
+        except IntegrityError:
+            # Moved onto another booking in Google; keep our slot rather than double-book.
+            logger.warning("Skipping Google change to appointment %s: overlaps another appointment", appointment.id)
+            continue
+        enqueue_refresh(db, user_id, previous_starts_at, appointment.starts_at)
+        applied += 1
+    return applied
+
+
+def _full_sync_token(service, calendar_id: str) -> str:
+    page_token = None
+    while True:
+        page = execute(service.events().list(
+            calendarId=calendar_id,
+            pageToken=page_token,
+            showDeleted=True,
+            singleEvents=True,
+            maxResults=2500,
+            fields="nextPageToken,nextSyncToken",
+        ), "events.list")
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return page["nextSyncToken"]
+
+
+def _stop_channel(service, channel: GoogleWatchChannel) -> None:
+    try:
+        execute(service.channels().stop(body={"id": channel.channel_id, "resourceId": channel.resource_id}), "channels.stop")
+    except HttpError as exc:
+        # Already expired or stopped on Google's side.
+        logger.info("Could not stop channel %s: %s", channel.channel_id, exc)
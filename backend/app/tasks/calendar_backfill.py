@@ -0,0 +1,123 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+from redis.exceptions import LockError
+from sqlalchemy import select
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.session import SessionLocal
+from app.models.calendar_backfill import STATUS_RUNNING, CalendarBackfill
+from app.services.calendar_backfill import chunk_end, finish, get_backfill, import_events
+from app.services.google_api import GoogleUnavailable, execute, is_transient
+from app.services.google_calendar import BACKFILL_EVENT_LIST_FIELDS, calendar_service, get_credential_record
+from app.tasks.calendar import _retry_countdown
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, name="app.tasks.calendar_backfill.backfill_calendar_history", queue="calendar", max_retries=10)
+def backfill_calendar_history(self, user_id: int):
+    """Import up to GOOGLE_BACKFILL_PAGES_PER_RUN pages from the user's checkpoint, then re-queue.
+
+    Every page is committed together with the checkpoint, so a run killed at any
+    point loses at most the page in flight, and re-running a page is harmless.
+    """
+    lock = get_redis().lock(f"calendar:backfill-lock:{user_id}", timeout=settings.GOOGLE_BACKFILL_STALE_SECONDS)
+    if not lock.acquire(blocking=False):
+        return {"user_id": user_id, "imported": 0, "locked": True}
+
+    db = SessionLocal()
+    imported = 0
+    more = False
+    try:
+        backfill = get_backfill(db, user_id)
+        if not backfill or backfill.status != STATUS_RUNNING:
+            return {"user_id": user_id, "imported": 0}
+        cred = get_credential_record(db, user_id)
+        try:
+            service = calendar_service(db, cred) if cred else None
+            if not service:
+                finish(backfill, error="not connected")
+                db.commit()
+                return {"user_id": user_id, "imported": 0, "status": backfill.status}
+
+            for _ in range(settings.GOOGLE_BACKFILL_PAGES_PER_RUN):
+                if backfill.status != STATUS_RUNNING:
+                    break
+                if backfill.cursor >= backfill.window_end:
+                    finish(backfill)
+                    db.commit()
+                    break
+                end = chunk_end(backfill)
+                page = execute(service.events().list(
+                    calendarId=backfill.calendar_id,
+                    timeMin=backfill.cursor.isoformat(),
+                    timeMax=end.isoformat(),
+                    pageToken=backfill.page_token,
+                    singleEvents=True,
+                    maxResults=settings.GOOGLE_BACKFILL_PAGE_SIZE,
+                    fields=BACKFILL_EVENT_LIST_FIELDS,
+                ), "events.list")
+                try:
+                    page_imported = import_events(db, backfill, page.get("items", []))
+                    backfill.page_token = page.get("nextPageToken")
+                    if not backfill.page_token:
+                        backfill.cursor = end
+                    db.commit()
+                    imported += page_imported
+                except StaleDataError:
+                    # Restarted (e.g. another calendar selected) while this page was in flight;
+                    # drop the page and continue from the new checkpoint.
+                    db.rollback()
+                lock.reacquire()
+            else:
+                more = True
+        except GoogleUnavailable as exc:
+            db.rollback()
+            raise self.retry(exc=exc, countdown=exc.retry_after)
+        except Exception as exc:
+            db.rollback()
+            if isinstance(exc, HttpError) and exc.resp.status == 410:
+                # The page token expired; redo the current chunk from its start.
+                backfill.page_token = None
+                db.commit()
+                raise self.retry(exc=exc, countdown=0)
+            if is_transient(exc):
+                raise self.retry(exc=exc, countdown=_retry_countdown(self.request.retries))
+            logger.warning("Calendar backfill for user %s failed: %s", user_id, exc)
+            finish(backfill, error=str(exc)[:1000])
+            db.commit()
+            return {"user_id": user_id, "imported": imported, "status": backfill.status}
+        return {"user_id": user_id, "imported": imported, "status": backfill.status}
+    finally:
+        db.close()
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("Calendar backfill lock for user %s expired before release", user_id)
+        if more:
+            # Page budget used up: continue in a fresh task so other calendar work can interleave.
+            backfill_calendar_history.delay(user_id)
+
+
+@celery_app.task(name="app.tasks.calendar_backfill.resume_calendar_backfills", queue="calendar")
+def resume_calendar_backfills():
+    """Re-queue running imports that stopped advancing, e.g. after a worker restart lost their task."""
+    db = SessionLocal()
+    try:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.GOOGLE_BACKFILL_STALE_SECONDS)
+        user_ids = db.execute(
+            select(CalendarBackfill.user_id).where(
+                CalendarBackfill.status == STATUS_RUNNING, CalendarBackfill.updated_at < stale_before
+            )
+        ).scalars().all()
+    finally:
+        db.close()
+
+    for user_id in user_ids:
+        backfill_calendar_history.delay(user_id)
+    return {"resumed": sorted(user_ids)}
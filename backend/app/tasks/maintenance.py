@@ -0,0 +1,22 @@
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.partitions import archive_partitions, ensure_partitions
+from app.db.session import engine
+
+
+@celery_app.task(name="app.tasks.maintenance.ensure_appointment_partitions", queue="default")
+def ensure_appointment_partitions():
+    with engine.begin() as conn:
+        created = ensure_partitions(conn, settings.APPOINTMENT_PARTITION_MONTHS_AHEAD)
+    return {"created": created}
+
+
+@celery_app.task(name="app.tasks.maintenance.archive_appointment_partitions", queue="default")
+def archive_appointment_partitions():
+    if settings.APPOINTMENT_ARCHIVE_AFTER_MONTHS <= 0:
+        return {"archived": []}
+    with engine.connect() as conn:
+        archived = archive_partitions(
+            conn, settings.APPOINTMENT_ARCHIVE_AFTER_MONTHS, settings.APPOINTMENT_ARCHIVE_SCHEMA
+        )
+    return {"archived": archived}
@@ -0,0 +1,64 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.outbox_event import OutboxEvent
+from app.services.outbox import ROUTES
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.tasks.outbox.relay_outbox", queue="default", ignore_result=True)
+def relay_outbox():
+    """Publish pending outbox rows in batches.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so overlapping relay runs split
+    the backlog instead of waiting on each other. If publishing fails part-way
+    the batch rolls back and is published again, which consumers tolerate.
+    """
+    relayed = 0
+    for _ in range(settings.OUTBOX_RELAY_MAX_BATCHES):
+        db = SessionLocal()
+        try:
+            batch = db.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.dispatched_at.is_(None))
+                .order_by(OutboxEvent.id)
+                .limit(settings.OUTBOX_RELAY_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not batch:
+                break
+            now = datetime.now(timezone.utc)
+            for event in batch:
+                route = ROUTES.get(event.topic)
+                if route is None:
+                    # Left pending it would be retried forever; drop it loudly instead.
+                    logger.error("Dropping outbox event %s: no route for topic %r", event.id, event.topic)
+                else:
+                    task_name, queue = route
+                    celery_app.send_task(task_name, kwargs=event.payload, queue=queue)
+                event.dispatched_at = now
+            db.commit()
+            relayed += len(batch)
+        finally:
+            db.close()
+        if len(batch) < settings.OUTBOX_RELAY_BATCH_SIZE:
+            break
+    return {"relayed": relayed}
+
+
+@celery_app.task(name="app.tasks.outbox.purge_outbox", queue="default")
+def purge_outbox():
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    db = SessionLocal()
+    try:
+        result = db.execute(delete(OutboxEvent).where(OutboxEvent.dispatched_at < cutoff))
+        db.commit()
+        return {"purged": result.rowcount}
+    finally:
+        db.close()
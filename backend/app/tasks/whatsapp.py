@@ -0,0 +1,107 @@
+import logging
+
+from redis.exceptions import LockError, ResponseError
+from sqlalchemy.dialects.postgresql import insert
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.session import SessionLocal
+from app.models.whatsapp_message import WhatsAppMessage
+from app.services.whatsapp import CONSUMER_GROUP, decode_entry, stream_key
+
+logger = logging.getLogger(__name__)
+
+# One consumer name per shard: the drain lock guarantees it is never used twice at once,
+# and entries a crashed drain left unacknowledged are read back first under the same name.
+CONSUMER = "drain"
+
+
+def drain_scheduled_key(shard: int) -> str:
+    return f"whatsapp:drain-scheduled:{shard}"
+
+
+@celery_app.task(name="app.tasks.whatsapp.drain_whatsapp_shard", queue="whatsapp", ignore_result=True)
+def drain_whatsapp_shard(shard: int):
+    """Store a shard's pending messages in stream order, in batches, then acknowledge them."""
+    redis = get_redis()
+    stream = stream_key(shard)
+    lock = redis.lock(f"whatsapp:drain-lock:{shard}", timeout=settings.WHATSAPP_DRAIN_LOCK_SECONDS)
+    if not lock.acquire(blocking=False):
+        # Another drain owns the shard and will pick these messages up.
+        return {"shard": shard, "drained": 0, "locked": True}
+
+    drained = 0
+    try:
+        # Messages appended from here on need a new drain, so let the webhook schedule one.
+        redis.delete(drain_scheduled_key(shard))
+        _ensure_group(redis, stream)
+        start_id = "0"  # our own unacknowledged entries first, then new ones
+        for _ in range(settings.WHATSAPP_DRAIN_MAX_BATCHES):
+            response = redis.xreadgroup(CONSUMER_GROUP, CONSUMER, {stream: start_id}, count=settings.WHATSAPP_DRAIN_BATCH_SIZE)
+            entries = response[0][1] if response else []
+            if not entries:
+                if start_id == "0":
+                    start_id = ">"
+                    continue
+                break
+            _store_messages([decode_entry(fields) for _, fields in entries])
+            ids = [entry_id for entry_id, _ in entries]
+            redis.xack(stream, CONSUMER_GROUP, *ids)
+            redis.xdel(stream, *ids)
+            drained += len(ids)
+            lock.reacquire()
+        else:
+            # Batch budget used up with messages still waiting: continue in a fresh task.
+            drain_whatsapp_shard.delay(shard)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("WhatsApp drain lock for shard %s expired before release", shard)
+    return {"shard": shard, "drained": drained}
+
+
+@celery_app.task(name="app.tasks.whatsapp.sweep_whatsapp_streams", queue="whatsapp")
+def sweep_whatsapp_streams():
+    """Safety net for shards whose drain was never scheduled (e.g. the broker was down)."""
+    redis = get_redis()
+    pipe = redis.pipeline(transaction=False)
+    for shard in range(settings.WHATSAPP_STREAM_SHARDS):
+        pipe.xlen(stream_key(shard))
+    backlog = [shard for shard, length in enumerate(pipe.execute()) if length]
+    for shard in backlog:
+        drain_whatsapp_shard.delay(shard)
+    return {"shards": backlog}
+
+
+def _ensure_group(redis, stream: str) -> None:
+    try:
+        redis.xgroup_create(stream, CONSUMER_GROUP, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+def _store_messages(messages: list[dict]) -> None:
+    rows = [
+        {
+            "provider_message_id": message["provider_message_id"],
+            "phone_number_id": message["phone_number_id"],
+            "from_phone": message["from_phone"],
+            "conversation_key": message["conversation_key"],
+            "message_type": message["message_type"],
+            "body": message["body"],
+            "payload": message["raw"],
+            "sent_at": message["sent_at"],
+        }
+        for message in messages
+    ]
+    db = SessionLocal()
+    try:
+        # Providers redeliver on timeouts; the unique message id makes redelivery a no-op.
+        stmt = insert(WhatsAppMessage).values(rows).on_conflict_do_nothing(index_elements=["provider_message_id"])
+        db.execute(stmt)
+        db.commit()
+    finally:
+        db.close()
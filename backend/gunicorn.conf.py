@@ -0,0 +1,61 @@
+"""Gunicorn settings for production: ``gunicorn -c gunicorn.conf.py app.main:app``.
+
+The app is imported once in the master (preload_app) and forked into uvicorn
+workers. Each worker runs the app lifespan, which sizes its threadpool and
+warms up DB/Redis pools before it accepts connections. Workers are recycled
+after a jittered number of requests.
+"""
+
+import logging
+import multiprocessing
+import os
+
+from app.core.config import settings
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def _workers() -> int:
+    """WEB_CONCURRENCY if set, else 2 * CPU + 1 capped so all workers fit in DB_CONNECTION_BUDGET."""
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    by_cpu = multiprocessing.cpu_count() * 2 + 1
+    per_worker = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    by_db = settings.DB_CONNECTION_BUDGET // max(per_worker, 1)
+    return max(1, min(by_cpu, by_db))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = _workers()
+preload_app = True
+
+# Graceful recycling bounds slow leaks; jitter keeps workers from restarting together.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    logger.info(
+        "Serving with %s workers, %s threads each (DB pool %s + %s)",
+        workers,
+        settings.API_THREADPOOL_SIZE or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        settings.DB_POOL_SIZE,
+        settings.DB_MAX_OVERFLOW,
+    )
+
+
+def post_fork(server, worker):
+    # Connections opened in the master during preload must not be shared across processes.
+    from app.core.redis import get_redis
+    from app.db.session import all_engines
+
+    for engine in all_engines():
+        engine.dispose(close=False)
+    get_redis.cache_clear()
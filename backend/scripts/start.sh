@@ -0,0 +1,5 @@
+#!/usr/bin/env bash
+# Production entrypoint; scripts/dev.sh keeps the auto-reloading uvicorn for local work.
+set -euo pipefail
+export PYTHONPATH=.
+exec gunicorn -c gunicorn.conf.py app.main:app
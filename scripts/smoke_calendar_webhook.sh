@@ -0,0 +1,15 @@
+#!/usr/bin/env sh
+# Stand-in for Google: post a push notification for an existing watch channel.
+# Usage: CHANNEL_ID=... CHANNEL_TOKEN=... bash scripts/smoke_calendar_webhook.sh
+set -e
+API_BASE="${API_BASE:-http://localhost:8000}"
+: "${CHANNEL_ID:?set CHANNEL_ID (google_watch_channels.channel_id)}"
+: "${CHANNEL_TOKEN:?set CHANNEL_TOKEN (google_watch_channels.token)}"
+RESOURCE_STATE="${RESOURCE_STATE:-exists}"
+
+curl -s -o /dev/null -w "%{http_code}\n" -X POST "$API_BASE/v1/calendar/webhook" \
+  -H "X-Goog-Channel-ID: $CHANNEL_ID" \
+  -H "X-Goog-Channel-Token: $CHANNEL_TOKEN" \
+  -H "X-Goog-Resource-ID: local-stub" \
+  -H "X-Goog-Resource-State: $RESOURCE_STATE" \
+  -H "X-Goog-Message-Number: 1"
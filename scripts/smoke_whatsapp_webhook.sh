@@ -0,0 +1,29 @@
+#!/usr/bin/env sh
+# Stand-in for the WhatsApp Cloud API: post a signed burst of inbound text messages.
+# Usage: WHATSAPP_APP_SECRET=... [COUNT=50] [FROM=5215550001234] bash scripts/smoke_whatsapp_webhook.sh
+set -e
+API_BASE="${API_BASE:-http://localhost:8000}"
+: "${WHATSAPP_APP_SECRET:?set WHATSAPP_APP_SECRET (same value as the backend)}"
+COUNT="${COUNT:-50}"
+FROM="${FROM:-5215550001234}"
+PHONE_NUMBER_ID="${PHONE_NUMBER_ID:-local-stub}"
+RUN_ID="$(date +%s)"
+
+MESSAGES=""
+i=1
+while [ "$i" -le "$COUNT" ]; do
+  [ -n "$MESSAGES" ] && MESSAGES="$MESSAGES,"
+  MESSAGES="$MESSAGES{\"from\":\"$FROM\",\"id\":\"wamid.stub.$RUN_ID.$i\",\"timestamp\":\"$RUN_ID\",\"type\":\"text\",\"text\":{\"body\":\"mensaje $i\"}}"
+  i=$((i + 1))
+done
+BODY="{\"object\":\"whatsapp_business_account\",\"entry\":[{\"id\":\"stub\",\"changes\":[{\"field\":\"messages\",\"value\":{\"messaging_product\":\"whatsapp\",\"metadata\":{\"phone_number_id\":\"$PHONE_NUMBER_ID\"},\"messages\":[$MESSAGES]}}]}]}"
+SIGNATURE="sha256=$(printf '%s' "$BODY" | openssl dgst -sha256 -hmac "$WHATSAPP_APP_SECRET" | sed 's/^.* //')"
+
+# Posting twice checks deduplication: whatsapp_messages should gain COUNT rows, not 2 * COUNT.
+for attempt in 1 2; do
+  curl -s -o /dev/null -w "%{http_code} %{time_total}s\n" -X POST "$API_BASE/v1/whatsapp/webhook" \
+    -H "Content-Type: application/json" \
+    -H "X-Hub-Signature-256: $SIGNATURE" \
+    --data "$BODY"
+done
+echo "Check: SELECT count(*) FROM whatsapp_messages WHERE provider_message_id LIKE 'wamid.stub.$RUN_ID.%';"